@@ -0,0 +1,187 @@
+import ast
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import drive_functions
+from engine_random import rng
+from roster import build_team, find_team_data
+from game_functions import apply_baseline_fatigue
+from start_game import play_game
+
+# Allocation profiling for the play loop.
+#
+# Games are played under tracemalloc with sim_play wrapped so every play is
+# measured on its own:
+#   retained: blocks/bytes still allocated when the play returns
+#   peak:     highest traced memory during the play above where it started,
+#             i.e. the transient garbage a play builds up
+# Retained blocks are attributed to the engine function that allocated them
+# from one snapshot diff per game (snapshots are too expensive to take every
+# play). tracemalloc only sees live blocks, so an object allocated and freed
+# within a play shows up in peak but not in retained.
+#
+# GC collections and pause times come from a second, untraced pass over the
+# same seeds so the profiler's own objects don't set off collections.
+
+ENGINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_function_ranges = {}
+
+def _function_at(filename, lineno):
+    # Innermost def/class enclosing lineno in filename, e.g. "assign_tackles"
+    # or "Player.apply_fatigue_penalty"
+    ranges = _function_ranges.get(filename)
+    if ranges is None:
+        ranges = []
+        try:
+            with open(filename) as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError):
+            tree = None
+
+        def visit(node, prefix):
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    name = prefix + child.name
+                    ranges.append((child.lineno, child.end_lineno, name))
+                    visit(child, name + ".")
+                else:
+                    visit(child, prefix)
+
+        if tree is not None:
+            visit(tree, "")
+        _function_ranges[filename] = ranges
+
+    best = None
+    for start, end, name in ranges:
+        if start <= lineno <= end and (best is None or start >= best[0]):
+            best = (start, name)
+    module = os.path.splitext(os.path.basename(filename))[0]
+    return f"{module}.{best[1]}" if best else f"{module}:<module>"
+
+def _engine_frame(traceback):
+    # Deepest frame of the allocation that is in engine code
+    for frame in reversed(traceback):
+        if frame.filename.startswith(ENGINE_DIR) and not frame.filename.endswith("alloc_profile.py"):
+            return frame
+    return None
+
+
+class AllocationProfile:
+    def __init__(self):
+        self.plays = 0
+        self.games = 0
+        self.retained_blocks = 0
+        self.retained_bytes = 0
+        self.peak_bytes = 0
+        self.max_peak_bytes = 0
+        self.by_function = {}     # function -> [blocks, bytes] retained over all plays
+        self.gc_collections = [0, 0, 0]
+        self.gc_seconds = 0.0
+
+    def report(self, top=15):
+        plays = max(self.plays, 1)
+        games = max(self.games, 1)
+        lines = [
+            f"{self.games} games, {self.plays} plays ({self.plays / games:.0f} per game)",
+            f"retained per play: {self.retained_blocks / plays:.2f} blocks, {self.retained_bytes / plays:.0f} bytes",
+            f"transient peak per play: {self.peak_bytes / plays:.0f} bytes avg, {self.max_peak_bytes} max",
+            f"GC collections per game (gen0/1/2): "
+            + "/".join(f"{n / games:.1f}" for n in self.gc_collections)
+            + f", {self.gc_seconds / games * 1000:.2f} ms paused",
+            "",
+            f"{'retained by function':<45}{'blocks/play':>12}{'bytes/play':>12}",
+        ]
+        ranked = sorted(self.by_function.items(), key=lambda item: -item[1][0])
+        for function, (blocks, size) in ranked[:top]:
+            lines.append(f"{function:<45}{blocks / plays:>12.2f}{size / plays:>12.0f}")
+        return "\n".join(lines)
+
+
+def _play(home_data, away_data, seed):
+    rng.seed(seed)
+    home_team = build_team(home_data)
+    away_team = build_team(away_data)
+    apply_baseline_fatigue(home_team)
+    apply_baseline_fatigue(away_team)
+    return home_team, away_team
+
+def profile_allocations(roster_data, home=0, away=1, start_seed=0, games=5, frames=8):
+    """
+    Plays seeded games under tracemalloc and returns an AllocationProfile.
+    Runs several times slower than a normal batch.
+    """
+    home_data = find_team_data(roster_data, home)
+    away_data = find_team_data(roster_data, away)
+    profile = AllocationProfile()
+    original_sim_play = drive_functions.sim_play
+    getallocatedblocks = sys.getallocatedblocks
+
+    def measured_sim_play(*args, **kwargs):
+        start_blocks = getallocatedblocks()
+        start_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = original_sim_play(*args, **kwargs)
+        size, peak = tracemalloc.get_traced_memory()
+        profile.plays += 1
+        profile.retained_blocks += getallocatedblocks() - start_blocks
+        profile.retained_bytes += size - start_size
+        profile.peak_bytes += peak - start_size
+        profile.max_peak_bytes = max(profile.max_peak_bytes, peak - start_size)
+        return result
+
+    # Snapshot bookkeeping allocates too; leave it out of the diffs
+    ignore = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+
+    drive_functions.sim_play = measured_sim_play
+    tracemalloc.start(frames)
+    try:
+        for seed in range(start_seed, start_seed + games):
+            home_team, away_team = _play(home_data, away_data, seed)
+            before = tracemalloc.take_snapshot().filter_traces(ignore)
+            play_game(home_team, away_team)
+            after = tracemalloc.take_snapshot().filter_traces(ignore)
+            for stat in after.compare_to(before, "traceback"):
+                frame = _engine_frame(stat.traceback)
+                if frame is None or stat.count_diff == 0:
+                    continue
+                function = _function_at(frame.filename, frame.lineno)
+                totals = profile.by_function.setdefault(function, [0, 0])
+                totals[0] += stat.count_diff
+                totals[1] += stat.size_diff
+            profile.games += 1
+            del before, after, home_team, away_team
+    finally:
+        tracemalloc.stop()
+        drive_functions.sim_play = original_sim_play
+
+    gc_started = [0.0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            gc_started[0] = time.perf_counter()
+        else:
+            profile.gc_collections[info["generation"]] += 1
+            profile.gc_seconds += time.perf_counter() - gc_started[0]
+
+    gc.collect()
+    gc.callbacks.append(on_gc)
+    try:
+        for seed in range(start_seed, start_seed + games):
+            play_game(*_play(home_data, away_data, seed))
+    finally:
+        gc.callbacks.remove(on_gc)
+    return profile
+
+
+if __name__ == "__main__":
+    # python alloc_profile.py [GAMES]
+    from roster import load_roster_data
+    from start_game import ROSTER_PATH
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(profile_allocations(load_roster_data(ROSTER_PATH), games=games).report())
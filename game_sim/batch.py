@@ -0,0 +1,206 @@
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+from game_context import GameContext
+from roster import find_team_data
+from shared_roster import SharedRoster, attach_roster, new_team, team_data
+from game_functions import apply_baseline_fatigue
+from start_game import play_game
+from player_distributions import PlayerStatDistributions
+from play_log import PlayLog
+
+# Batch results are plain dicts so they can be pickled back from workers,
+# written to the result cache and merged:
+# {
+#   "games": 10000, "ties": 12,
+#   "team1": {"name": ..., "points": ..., "wins": ..., "stats": {stat: total}},
+#   "team2": {...},
+#   "box_scores": [...],           # only when requested, one produce_box_score() per game
+#   "player_distributions": {...}  # only when requested, PlayerStatDistributions.to_dict()
+# }
+
+def sim_seeded_game(home_data, away_data, seed, play_log=None, constants=None):
+    # Every game gets its own seed so any slice of a batch can be re-run on its
+    # own, and its own GameContext so games can run in threads. Either side can
+    # also be an index into the worker's shared roster. constants: an
+    # EngineConstants to play with instead of the engine's own
+    ctx = GameContext.seeded(seed, constants)
+    home_team = new_team(home_data)
+    away_team = new_team(away_data)
+    apply_baseline_fatigue(home_team, ctx)
+    apply_baseline_fatigue(away_team, ctx)
+    return home_team, away_team, play_game(home_team, away_team, play_log=play_log, ctx=ctx)
+
+def empty_batch(home_name, away_name, box_scores=False, player_distributions=False):
+    batch = {
+        "games": 0,
+        "ties": 0,
+        "team1": {"name": home_name, "points": 0, "wins": 0, "stats": {}},
+        "team2": {"name": away_name, "points": 0, "wins": 0, "stats": {}},
+    }
+    if box_scores:
+        batch["box_scores"] = []
+    if player_distributions:
+        batch["player_distributions"] = {}
+    return batch
+
+def add_box_score(batch, box):
+    batch["games"] += 1
+    score1 = box["team1"]["score"]
+    score2 = box["team2"]["score"]
+    if score1 > score2:
+        batch["team1"]["wins"] += 1
+    elif score2 > score1:
+        batch["team2"]["wins"] += 1
+    else:
+        batch["ties"] += 1
+    for side in ("team1", "team2"):
+        totals = batch[side]
+        totals["points"] += box[side]["score"]
+        for stat, value in box[side]["stats"].items():
+            totals["stats"][stat] = totals["stats"].get(stat, 0) + value
+    if "box_scores" in batch:
+        batch["box_scores"].append(box)
+
+def merge_batches(first, second):
+    # Order matters only for box_scores, which stay in seed order
+    merged = empty_batch(
+        first["team1"]["name"], first["team2"]["name"],
+        "box_scores" in first, "player_distributions" in first
+    )
+    for batch in (first, second):
+        merged["games"] += batch["games"]
+        merged["ties"] += batch["ties"]
+        for side in ("team1", "team2"):
+            totals = merged[side]
+            totals["points"] += batch[side]["points"]
+            totals["wins"] += batch[side]["wins"]
+            for stat, value in batch[side]["stats"].items():
+                totals["stats"][stat] = totals["stats"].get(stat, 0) + value
+        if "box_scores" in merged:
+            merged["box_scores"].extend(batch.get("box_scores", []))
+    if "player_distributions" in merged:
+        dists = PlayerStatDistributions.from_dict(first["player_distributions"])
+        dists.merge(PlayerStatDistributions.from_dict(second["player_distributions"]))
+        merged["player_distributions"] = dists.to_dict()
+    return merged
+
+def run_seed_range(home_data, away_data, start_seed, games, box_scores=False, player_distributions=False,
+                   constants=None):
+    batch = empty_batch(
+        team_data(home_data)["team_name"], team_data(away_data)["team_name"], box_scores, player_distributions
+    )
+    dists = PlayerStatDistributions() if player_distributions else None
+    for seed in range(start_seed, start_seed + games):
+        home_team, away_team, box = sim_seeded_game(home_data, away_data, seed, constants=constants)
+        add_box_score(batch, box)
+        if dists is not None:
+            dists.add_game(home_team, away_team)
+    if dists is not None:
+        batch["player_distributions"] = dists.to_dict()
+    return batch
+
+def _run_seed_range(args):
+    return run_seed_range(*args)
+
+def game_record(seed, home_team, away_team, box, plays=None):
+    # Compact per-game result with every player line that has a nonzero stat,
+    # the unit the season runner and the results store work with. plays is a
+    # PlayLog's play-by-play, when it was recorded
+    players = []
+    for team, opponent, is_home in ((home_team, away_team, True), (away_team, home_team, False)):
+        for player in team.offense + team.defense:
+            if any(player.stats.values()):
+                players.append((team.name, opponent.name, is_home, player.name, player.position, dict(player.stats)))
+    record = {
+        "seed": seed,
+        "home": home_team.name,
+        "away": away_team.name,
+        "home_score": box["team1"]["score"],
+        "away_score": box["team2"]["score"],
+        "box": box,
+        "players": players,
+    }
+    if plays is not None:
+        record["plays"] = plays
+    return record
+
+def _record_games(args):
+    # games is a list of (home_data, away_data, seed) so one task can mix matchups
+    games, play_by_play = args
+    records = []
+    for home_data, away_data, seed in games:
+        play_log = PlayLog() if play_by_play else None
+        home_team, away_team, box = sim_seeded_game(home_data, away_data, seed, play_log)
+        records.append(game_record(seed, home_team, away_team, box, play_log.plays if play_log else None))
+    return records
+
+def iter_game_records(games, workers=1, chunk_games=64, play_by_play=False, threads=False):
+    """
+    Yields game_record() dicts for each (home_data, away_data, seed) in games,
+    in order, with the play-by-play under "plays" if play_by_play is set.
+    With workers > 1 the games are simulated in chunks on a process pool, or
+    on a thread pool with threads=True (see run_batch).
+    """
+    games = list(games)
+    if workers <= 1:
+        for i in range(0, len(games), chunk_games):
+            yield from _record_games((games[i:i + chunk_games], play_by_play))
+        return
+    if threads:
+        chunks = [(games[i:i + chunk_games], play_by_play) for i in range(0, len(games), chunk_games)]
+        with ThreadPoolExecutor(workers) as executor:
+            for records in executor.map(_record_games, chunks):
+                yield from records
+        return
+    # Workers get every team once through a shared roster, and tasks only
+    # carry team indices and seeds
+    teams = {id(team): team for home_data, away_data, _ in games for team in (home_data, away_data)}
+    with SharedRoster(teams.values()) as shared, \
+            Pool(workers, initializer=attach_roster, initargs=(shared.name,)) as pool:
+        games = [(shared.index(home_data), shared.index(away_data), seed) for home_data, away_data, seed in games]
+        chunks = [(games[i:i + chunk_games], play_by_play) for i in range(0, len(games), chunk_games)]
+        for records in pool.imap(_record_games, chunks):
+            yield from records
+
+def split_seed_range(start_seed, games, chunks):
+    chunks = max(1, min(chunks, games))
+    size, extra = divmod(games, chunks)
+    ranges = []
+    seed = start_seed
+    for i in range(chunks):
+        count = size + (1 if i < extra else 0)
+        ranges.append((seed, count))
+        seed += count
+    return ranges
+
+def run_batch(roster_data, home, away, start_seed=0, games=1000, workers=1, box_scores=False,
+              player_distributions=False, threads=False):
+    """
+    With workers > 1 the seed range is split across a process pool, or with
+    threads=True across a thread pool in this process. Every game has its own
+    GameContext and Teams, so threads share nothing mutable; they skip the
+    pool start-up and pickling, which suits small batches, and play in
+    parallel on free-threaded Python builds.
+    """
+    home_data = find_team_data(roster_data, home)
+    away_data = find_team_data(roster_data, away)
+    if workers <= 1 or games < 2:
+        return run_seed_range(home_data, away_data, start_seed, games, box_scores, player_distributions)
+
+    # A few chunks per worker keeps the pool busy; merging in seed order means
+    # the result does not depend on the worker count
+    ranges = split_seed_range(start_seed, games, workers * 4)
+    if threads:
+        tasks = [(home_data, away_data, seed, count, box_scores, player_distributions) for seed, count in ranges]
+        with ThreadPoolExecutor(workers) as executor:
+            parts = list(executor.map(_run_seed_range, tasks))
+    else:
+        tasks = [(0, 1, seed, count, box_scores, player_distributions) for seed, count in ranges]
+        with SharedRoster([home_data, away_data]) as shared, \
+                Pool(workers, initializer=attach_roster, initargs=(shared.name,)) as pool:
+            parts = pool.map(_run_seed_range, tasks)
+
+    batch = parts[0]
+    for part in parts[1:]:
+        batch = merge_batches(batch, part)
+    return batch
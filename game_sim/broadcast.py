@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import sys
+import time
+from game_context import GameContext
+from game_functions import apply_baseline_fatigue
+from play_log import PlayLog
+from roster import build_team, load_roster_data
+from start_game import game_plays
+
+# Paced live games. Each LiveGame wraps the engine's game_plays() generator,
+# which stops after every snap, kick and punt, and a BroadcastScheduler runs
+# thousands of them in one asyncio loop, releasing each play once the game
+# seconds it took have passed on the wall clock (scaled by speed). Events go
+# out to subscribers as dicts:
+#
+#   {"type": "play",  "game": id, "seq": n, "score": {...}, "play": PlayLog play dict}
+#   {"type": "drive", "game": id, "seq": n, "score": {...}, "drive": PlayLog drive dict}
+#   {"type": "final", "game": id, "seq": n, "score": {...}, "box": produce_box_score() dict}
+#
+# Each game draws from its own GameContext, so it plays exactly as
+# sim_seeded_game() with the same seed would, however the games interleave.
+# Per-game memory is the two rosters, the suspended generator and at most one
+# play's events.
+
+
+class LiveGame:
+    def __init__(self, game_id, home_data, away_data, seed):
+        self.game_id = game_id
+        self.seed = seed
+        ctx = GameContext.seeded(seed)
+        home_team = build_team(home_data)
+        away_team = build_team(away_data)
+        apply_baseline_fatigue(home_team, ctx)
+        apply_baseline_fatigue(away_team, ctx)
+        self.score = {home_team.name: 0, away_team.name: 0}
+        self.log = PlayLog()
+        self.box = None
+        self.seq = 0
+        self._plays = game_plays(home_team, away_team, play_log=self.log, ctx=ctx)
+
+    @property
+    def finished(self):
+        return self.box is not None
+
+    def _event(self, kind, key, value):
+        self.seq += 1
+        return {"type": kind, "game": self.game_id, "seq": self.seq, "score": dict(self.score), key: value}
+
+    def step(self):
+        # Plays up to the next snap, kick, punt or end of drive. Returns the
+        # game seconds it took and the events it produced.
+        try:
+            seconds = next(self._plays)
+        except StopIteration as done:
+            seconds = 0
+            self.box = done.value
+
+        events = [self._event("play", "play", play) for play in self.log.plays]
+        for drive in self.log.drives:
+            self.score = drive["score"]
+            events.append(self._event("drive", "drive", drive))
+        self.log.plays.clear()
+        self.log.drives.clear()
+        if self.box is not None:
+            self.score = {self.box[side]["name"]: self.box[side]["score"] for side in ("team1", "team2")}
+            events.append(self._event("final", "box", self.box))
+            self._plays = None
+        return seconds, events
+
+
+class Subscription:
+    """
+    Async iterator over broadcast events. A subscriber that falls more than
+    queue_size events behind loses the oldest ones (counted in dropped)
+    rather than holding up the games.
+    """
+
+    def __init__(self, scheduler, game_id, queue_size):
+        self.scheduler = scheduler
+        self.game_id = game_id
+        self.queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, event):
+        if self.closed:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def close(self):
+        # Ends iteration once the queued events are read
+        if not self.closed:
+            self.push(None)
+            self.closed = True
+            self.scheduler._unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.queue.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+
+class BroadcastScheduler:
+    """
+    Runs LiveGames concurrently, each as one asyncio task that steps its game
+    and sleeps until the play's release time. Release times are kept on an
+    absolute schedule per game (start + game seconds so far / speed), so
+    slow steps don't accumulate drift. speed is game seconds per wall-clock
+    second: 1 is real time, 60 plays a half in under a minute.
+    """
+
+    def __init__(self, speed=1.0, queue_size=1024):
+        self.speed = speed
+        self.queue_size = queue_size
+        self.games = {}
+        self._starts = {}
+        self._subscribers = {None: set()}  # game id (None for every game) -> subscriptions
+        self._tasks = {}
+        self._running = False
+        self._next_id = 0
+        self.events_sent = 0
+
+    def add_game(self, home_data, away_data, seed, start_delay=0.0):
+        game_id = self._next_id
+        self._next_id += 1
+        self.games[game_id] = LiveGame(game_id, home_data, away_data, seed)
+        self._starts[game_id] = start_delay
+        if self._running:
+            self._tasks[game_id] = asyncio.get_running_loop().create_task(self._run_game(self.games[game_id]))
+        return game_id
+
+    def subscribe(self, game_id=None):
+        subscription = Subscription(self, game_id, self.queue_size)
+        self._subscribers.setdefault(game_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        self._subscribers.get(subscription.game_id, set()).discard(subscription)
+
+    def _publish(self, game_id, events):
+        targets = self._subscribers[None] | self._subscribers.get(game_id, set())
+        for event in events:
+            for subscription in targets:
+                subscription.push(event)
+        self.events_sent += len(events) * len(targets)
+
+    async def _run_game(self, game):
+        loop = asyncio.get_running_loop()
+        release = loop.time() + self._starts.pop(game.game_id)
+        while not game.finished:
+            seconds, events = game.step()
+            release += seconds / self.speed
+            # Always give the loop a turn, so a game running behind schedule
+            # can't starve the others or its subscribers
+            await asyncio.sleep(max(0.0, release - loop.time()))
+            self._publish(game.game_id, events)
+        for subscription in list(self._subscribers.get(game.game_id, ())):
+            subscription.close()
+        del self.games[game.game_id]
+
+    async def run(self):
+        # Plays every added game (and any added while running) to the end
+        loop = asyncio.get_running_loop()
+        self._running = True
+        self._tasks = {game_id: loop.create_task(self._run_game(game)) for game_id, game in self.games.items()}
+        while self._tasks:
+            done = [game_id for game_id, task in self._tasks.items() if task.done()]
+            if not done:
+                await asyncio.wait(list(self._tasks.values()), return_when=asyncio.FIRST_COMPLETED)
+                continue
+            for game_id in done:
+                self._tasks.pop(game_id).result()
+        self._running = False
+        for subscription in list(self._subscribers[None]):
+            subscription.close()
+
+
+async def _count_events(subscription, counts):
+    async for event in subscription:
+        counts[event["type"]] = counts.get(event["type"], 0) + 1
+
+async def _load_test(roster_data, games, speed, stagger):
+    scheduler = BroadcastScheduler(speed)
+    teams = roster_data["teams"]
+    for i in range(games):
+        home, away = teams[i % len(teams)], teams[(i + 1) % len(teams)]
+        scheduler.add_game(home, away, seed=i, start_delay=stagger * i / max(games, 1))
+    counts = {}
+    subscription = scheduler.subscribe()
+    counter = asyncio.ensure_future(_count_events(subscription, counts))
+    await scheduler.run()
+    await counter
+    return counts, subscription.dropped
+
+
+def main(argv=None):
+    # Load test: N paced games in one process, e.g.
+    #   python broadcast.py -n 2000 --speed 120
+    from start_game import ROSTER_PATH
+    parser = argparse.ArgumentParser(description="Run paced live games and report event throughput.")
+    parser.add_argument("--roster", help="roster JSON file (default: rosters.json next to this script)")
+    parser.add_argument("-n", "--games", type=int, default=1000, help="concurrent games (default: 1000)")
+    parser.add_argument("--speed", type=float, default=60.0, help="game seconds per wall second (default: 60)")
+    parser.add_argument("--stagger", type=float, default=5.0, help="spread game starts over this many seconds")
+    args = parser.parse_args(argv)
+
+    roster_data = load_roster_data(args.roster or ROSTER_PATH)
+    wall, cpu = time.perf_counter(), time.process_time()
+    counts, dropped = asyncio.run(_load_test(roster_data, args.games, args.speed, args.stagger))
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    print(f"{args.games} games at {args.speed:g}x: {sum(counts.values())} events "
+          f"({', '.join(f'{n} {kind}' for kind, n in sorted(counts.items()))}), {dropped} dropped")
+    print(f"{wall:.1f} s wall, {cpu:.1f} s CPU ({cpu / wall:.0%} of one core)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
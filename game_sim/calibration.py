@@ -0,0 +1,313 @@
+import argparse
+import sys
+from multiprocessing import Pool
+from batch import merge_batches, run_seed_range, split_seed_range
+from engine_constants import CONSTANTS_PATH, EngineConstants, constants, save_constants
+from roster import load_roster_data
+from shared_roster import SharedRoster, attach_roster
+
+# Fits engine constants so simulated league averages hit target values.
+#
+# Every evaluation plays every ordered pair of teams over the same seed range
+# (common random numbers): two sets of constants are compared on identical
+# games, so the difference between them is mostly the constants' doing and
+# not game-to-game noise. That keeps the objective smooth enough for a
+# damped Gauss-Newton fit with finite-difference slopes.
+
+# League averages, per team per game where that applies
+STATS = {
+    "yards_per_carry": lambda totals, games: totals["Rush Yards"] / max(totals["Carries"], 1),
+    "completion_pct": lambda totals, games: totals["Completions"] / max(totals["Pass Attempts"], 1),
+    "sacks_per_game": lambda totals, games: totals["Sacks Taken"] / games,
+    "points_per_game": lambda totals, games: totals["points"] / games,
+}
+
+# Recent NFL averages
+DEFAULT_TARGETS = {
+    "yards_per_carry": 4.3,
+    "completion_pct": 0.65,
+    "sacks_per_game": 2.3,
+    "points_per_game": 22.0,
+}
+
+# Constants the fit may move, with the range it keeps them in
+PARAMETER_BOUNDS = {
+    "base_run_yards": (2.0, 8.0),
+    "completion_baseline": (0.1, 0.6),
+    "sack_rate_base": (0.0, 0.05),
+    "sack_rate_per_down": (0.0, 0.02),
+    "offensive_penalty_rate": (0.0, 0.2),
+    "defensive_penalty_rate": (0.0, 0.2),
+}
+
+DEFAULT_PARAMETERS = ("base_run_yards", "completion_baseline", "sack_rate_base", "offensive_penalty_rate")
+
+def league_stats(batch):
+    # Both teams pooled, so a matchup and its reverse count the same
+    totals = {"points": batch["team1"]["points"] + batch["team2"]["points"]}
+    for side in ("team1", "team2"):
+        for stat, value in batch[side]["stats"].items():
+            totals[stat] = totals.get(stat, 0) + value
+    team_games = 2 * max(batch["games"], 1)
+    return {name: stat(totals, team_games) for name, stat in STATS.items()}
+
+def _simulate(args):
+    values, home_data, away_data, start_seed, games = args
+    return run_seed_range(home_data, away_data, start_seed, games, constants=EngineConstants(values))
+
+def _solve(matrix, vector):
+    # Gaussian elimination with partial pivoting; the systems here are tiny
+    n = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            raise ZeroDivisionError("singular system")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(col + 1, n):
+            factor = rows[r][col] / rows[col][col]
+            for c in range(col, n + 1):
+                rows[r][c] -= factor * rows[col][c]
+    solution = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        solution[r] = (rows[r][n] - sum(rows[r][c] * solution[c] for c in range(r + 1, n))) / rows[r][r]
+    return solution
+
+
+class Calibrator:
+    """
+    Fits `parameters` (names from PARAMETER_BOUNDS) so league_stats() over
+    every ordered matchup in the roster, seeds start_seed..start_seed+games,
+    matches `targets`. Constants that aren't fitted keep their current
+    values. Residuals are relative to the target, so a 5% miss on points
+    weighs the same as a 5% miss on completion percentage.
+
+    Parameters are fitted in units of their bounds' width. fit() runs
+    Levenberg-Marquardt style damped Gauss-Newton: each iteration plays the
+    current point plus one nudged point per parameter (all in one parallel
+    map), solves for a step, and keeps it only if it lowers the sum of
+    squared residuals, raising the damping otherwise.
+    """
+
+    def __init__(self, roster_data, targets=None, parameters=DEFAULT_PARAMETERS, games=1000,
+                 start_seed=0, workers=1, chunk_games=250):
+        self.targets = dict(targets or DEFAULT_TARGETS)
+        unknown = set(self.targets) - set(STATS)
+        if unknown:
+            raise ValueError(f"unknown calibration targets: {', '.join(sorted(unknown))}")
+        self.parameters = tuple(parameters)
+        for name in self.parameters:
+            if name not in PARAMETER_BOUNDS:
+                raise ValueError(f"{name!r} is not a fittable constant")
+        self.teams = roster_data["teams"]
+        n = len(self.teams)
+        self.matchups = [(home, away) for home in range(n) for away in range(n) if home != away]
+        self.games = games
+        self.start_seed = start_seed
+        self.workers = workers
+        self.chunk_games = chunk_games
+        self.base = constants.to_dict()
+        self.games_simulated = 0
+        self._pool = None
+        self._shared = None
+
+    def values(self, point):
+        # Full constants dict for a point in bound-width units
+        values = dict(self.base)
+        for name, u in zip(self.parameters, point):
+            low, high = PARAMETER_BOUNDS[name]
+            values[name] = low + u * (high - low)
+        return values
+
+    def to_point(self, values):
+        point = []
+        for name in self.parameters:
+            low, high = PARAMETER_BOUNDS[name]
+            point.append(min(1.0, max(0.0, (values[name] - low) / (high - low))))
+        return point
+
+    def evaluate(self, points, start_seed=None):
+        # league_stats() for each point, all played on the same seeds
+        start_seed = self.start_seed if start_seed is None else start_seed
+        chunks = split_seed_range(start_seed, self.games, max(1, self.games // self.chunk_games))
+        # Pool tasks refer to teams by their index in the shared roster
+        teams = self.teams if self.workers <= 1 else range(len(self.teams))
+        tasks = []
+        for point in points:
+            values = self.values(point)
+            for home, away in self.matchups:
+                for seed, count in chunks:
+                    tasks.append((values, teams[home], teams[away], seed, count))
+        if self.workers > 1:
+            if self._pool is None:
+                self._shared = SharedRoster(self.teams, self.base)
+                self._pool = Pool(self.workers, initializer=attach_roster, initargs=(self._shared.name,))
+            parts = self._pool.map(_simulate, tasks)
+        else:
+            parts = [_simulate(task) for task in tasks]
+        self.games_simulated += len(points) * len(self.matchups) * self.games
+
+        per_point = len(parts) // len(points)
+        stats = []
+        for i in range(len(points)):
+            group = parts[i * per_point:(i + 1) * per_point]
+            batch = group[0]
+            for part in group[1:]:
+                batch = merge_batches(batch, part)
+            stats.append(league_stats(batch))
+        return stats
+
+    def residuals(self, stats):
+        return [(stats[name] - target) / target for name, target in self.targets.items()]
+
+    def fit(self, max_iterations=12, tolerance=0.01, step=0.05, damping=1e-3):
+        """
+        Returns a dict with the fitted constants, the stats they give on the
+        fitting seeds and a per-iteration history. Stops once every stat is
+        within `tolerance` (relative) of its target.
+        """
+        point = self.to_point(self.base)
+        history = []
+        try:
+            stats = self.evaluate([point])[0]
+            for iteration in range(max_iterations):
+                residual = self.residuals(stats)
+                cost = sum(r * r for r in residual)
+                history.append({"values": self.values(point), "stats": stats, "cost": cost})
+                if max(abs(r) for r in residual) <= tolerance:
+                    break
+
+                # Forward differences, stepping inward at an upper bound
+                nudged = []
+                for j in range(len(point)):
+                    moved = list(point)
+                    moved[j] += step if point[j] + step <= 1.0 else -step
+                    nudged.append(moved)
+                slopes = []
+                for moved, moved_stats in zip(nudged, self.evaluate(nudged)):
+                    delta = [m - p for m, p in zip(moved, point) if m != p][0]
+                    slopes.append([(a - b) / delta for a, b in zip(self.residuals(moved_stats), residual)])
+                jacobian = [list(row) for row in zip(*slopes)]  # residual x parameter
+
+                n = len(point)
+                jtj = [[sum(row[a] * row[b] for row in jacobian) for b in range(n)] for a in range(n)]
+                jtr = [sum(row[a] * r for row, r in zip(jacobian, residual)) for a in range(n)]
+                improved = False
+                for _ in range(4):
+                    system = [
+                        [jtj[a][b] + (damping * (jtj[a][a] or 1.0) if a == b else 0.0) for b in range(n)]
+                        for a in range(n)
+                    ]
+                    try:
+                        delta = _solve(system, [-value for value in jtr])
+                    except ZeroDivisionError:
+                        damping *= 10
+                        continue
+                    candidate = [min(1.0, max(0.0, p + d)) for p, d in zip(point, delta)]
+                    candidate_stats = self.evaluate([candidate])[0]
+                    if sum(r * r for r in self.residuals(candidate_stats)) < cost:
+                        point, stats = candidate, candidate_stats
+                        damping = max(damping / 3, 1e-6)
+                        improved = True
+                        break
+                    damping *= 4
+                if not improved:
+                    break
+            else:
+                history.append({"values": self.values(point), "stats": stats,
+                                "cost": sum(r * r for r in self.residuals(stats))})
+        finally:
+            self.close()
+
+        return {
+            "constants": self.values(point),
+            "stats": stats,
+            "iterations": len(history),
+            "history": history,
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+
+def calibrate(roster_data, targets=None, parameters=DEFAULT_PARAMETERS, games=1000, start_seed=0,
+              workers=1, holdout=True, **fit_options):
+    """
+    Fits the constants and, with holdout, replays the fit on the next
+    `games` seeds so the report shows how it does on games it wasn't fitted
+    to. Nothing is written; pass the result to write_calibration() for that.
+    """
+    calibrator = Calibrator(roster_data, targets, parameters, games, start_seed, workers)
+    result = calibrator.fit(**fit_options)
+    if holdout:
+        calibrator.base = result["constants"]
+        result["holdout_stats"] = calibrator.evaluate([calibrator.to_point(result["constants"])],
+                                                      start_seed + games)[0]
+        calibrator.close()
+    result["targets"] = calibrator.targets
+    result["parameters"] = list(calibrator.parameters)
+    result["games"] = games
+    result["start_seed"] = start_seed
+    result["games_simulated"] = calibrator.games_simulated
+    return result
+
+def write_calibration(result, path=CONSTANTS_PATH):
+    # Saves the fitted constants as the next version of the constants file
+    rounded = {
+        name: round(value, 6) if isinstance(value, float) else value
+        for name, value in result["constants"].items()
+    }
+    details = {key: result[key] for key in ("targets", "stats", "parameters", "games", "start_seed")}
+    if "holdout_stats" in result:
+        details["holdout_stats"] = result["holdout_stats"]
+    return save_constants(rounded, path, calibration=details)
+
+def format_result(result):
+    lines = [f"{'stat':<18}{'target':>10}{'fitted':>10}" + (f"{'holdout':>10}" if "holdout_stats" in result else "")]
+    for name, target in result["targets"].items():
+        line = f"{name:<18}{target:>10.3f}{result['stats'][name]:>10.3f}"
+        if "holdout_stats" in result:
+            line += f"{result['holdout_stats'][name]:>10.3f}"
+        lines.append(line)
+    lines.append("")
+    for name in result["parameters"]:
+        lines.append(f"{name:<24}{result['constants'][name]:.4f}")
+    lines.append(f"{result['iterations']} iterations, {result['games_simulated']} games simulated")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from start_game import ROSTER_PATH
+    parser = argparse.ArgumentParser(description="Fit engine constants to target league averages.")
+    parser.add_argument("--roster", help="roster JSON file (default: rosters.json next to this script)")
+    for name, default in DEFAULT_TARGETS.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=float, default=default,
+                            help=f"target {name.replace('_', ' ')} (default: {default})")
+    parser.add_argument("--fit", nargs="+", default=list(DEFAULT_PARAMETERS), choices=sorted(PARAMETER_BOUNDS),
+                        metavar="CONSTANT", help="constants to fit (default: %(default)s)")
+    parser.add_argument("-n", "--games", type=int, default=1000, help="seeds per matchup per evaluation (default: 1000)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="first seed (default: 0)")
+    parser.add_argument("--iterations", type=int, default=12, help="maximum fit iterations (default: 12)")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="relative miss to stop at (default: 0.01)")
+    parser.add_argument("--write", action="store_true", help="save the fit as a new engine_constants.json version")
+    args = parser.parse_args(argv)
+
+    targets = {name: getattr(args, name) for name in DEFAULT_TARGETS}
+    roster_data = load_roster_data(args.roster or ROSTER_PATH)
+    result = calibrate(roster_data, targets, args.fit, args.games, args.seed, args.workers,
+                       max_iterations=args.iterations, tolerance=args.tolerance)
+    print(format_result(result))
+    if args.write:
+        version = write_calibration(result)
+        print(f"wrote {CONSTANTS_PATH} version {version}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
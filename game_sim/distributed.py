@@ -0,0 +1,271 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from multiprocessing import Process
+from multiprocessing.connection import Client, Listener
+from batch import merge_batches, run_batch, split_seed_range
+from roster import find_team_data
+
+# Sharded runs across machines. A Coordinator listens on a TCP port and hands
+# out shards to any worker that connects (python distributed.py worker
+# HOST:PORT on each node). Messages are pickled over
+# multiprocessing.connection, so anyone holding the key can run code on the
+# coordinator and on its workers. There is no built-in key: pass authkey or
+# set $FOOTBALL_SIM_AUTHKEY to a secret. The coordinator binds to loopback
+# unless given another address; only expose the port to machines you trust.
+#
+# Protocol, worker -> coordinator:
+#   ("ready",)                        give me a shard
+#   ("result", shard_id, partial)     finished shard
+#   ("error", shard_id, message)      shard raised
+# coordinator -> worker:
+#   ("shard", shard_id, kind, task)   run JOB_KINDS[kind] on task
+#   ("done",)                         no more work, disconnect
+
+AUTHKEY_ENV = "FOOTBALL_SIM_AUTHKEY"
+
+def _batch_shard(task):
+    home_data, away_data, start_seed, games, box_scores, player_distributions = task
+    return run_batch(
+        {"teams": [home_data, away_data]}, 0, 1, start_seed, games,
+        box_scores=box_scores, player_distributions=player_distributions
+    )
+
+# kind -> (run one shard, merge two partials). Partials are merged in shard
+# order, so the result doesn't depend on which worker ran what.
+JOB_KINDS = {
+    "batch": (_batch_shard, merge_batches),
+}
+
+def resolve_authkey(authkey=None):
+    # The key to authenticate with: authkey if given, else $FOOTBALL_SIM_AUTHKEY
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        raise ValueError(f"no auth key: pass authkey or set ${AUTHKEY_ENV} to a shared secret")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class ShardFailed(RuntimeError):
+    pass
+
+
+class Coordinator:
+    """
+    Serves one job's shards to workers until every shard has a result.
+
+    A shard is leased to one worker at a time. If that worker disconnects or
+    the lease runs out, the shard goes back on the queue for someone else; if
+    it raises, it is retried up to max_attempts times before the job fails.
+    A late duplicate result is dropped (shards are seeded, so it would be the
+    same anyway).
+    """
+
+    def __init__(self, address=("127.0.0.1", 0), authkey=None, lease_seconds=600, max_attempts=3):
+        self.listener = Listener(address, authkey=resolve_authkey(authkey))
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Condition()
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    def run(self, kind, tasks):
+        run_shard, merge = JOB_KINDS[kind]
+        self.kind = kind
+        self.tasks = list(tasks)
+        self.pending = deque(range(len(self.tasks)))
+        self.leases = {}      # shard_id -> lease deadline
+        self.attempts = [0] * len(self.tasks)
+        self.results = {}
+        self.error = None
+
+        acceptor = threading.Thread(target=self._accept, daemon=True)
+        acceptor.start()
+        with self._lock:
+            while len(self.results) < len(self.tasks) and self.error is None:
+                self._lock.wait(timeout=1)
+                self._expire_leases()
+        self.listener.close()
+        if self.error is not None:
+            raise ShardFailed(self.error)
+
+        merged = self.results[0]
+        for shard_id in range(1, len(self.tasks)):
+            merged = merge(merged, self.results[shard_id])
+        return merged
+
+    def _expire_leases(self):
+        now = time.monotonic()
+        for shard_id, deadline in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[shard_id]
+                self.pending.append(shard_id)
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError):
+                return  # listener closed, or a client failed the handshake
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _next_shard(self):
+        # Blocks until there is a shard to hand out or the job is over
+        with self._lock:
+            while True:
+                if self.error is not None or len(self.results) == len(self.tasks):
+                    return None
+                self._expire_leases()
+                while self.pending:
+                    shard_id = self.pending.popleft()
+                    if shard_id not in self.results:
+                        self.leases[shard_id] = time.monotonic() + self.lease_seconds
+                        return shard_id
+                self._lock.wait(timeout=1)
+
+    def _release(self, shard_id):
+        # The worker holding shard_id went away; put it back
+        with self._lock:
+            if shard_id not in self.results and self.leases.pop(shard_id, None) is not None:
+                self.pending.append(shard_id)
+                self._lock.notify_all()
+
+    def _serve(self, conn):
+        shard_id = None
+        try:
+            while True:
+                message = conn.recv()
+                if message[0] == "result":
+                    _, shard_id, partial = message
+                    with self._lock:
+                        self.leases.pop(shard_id, None)
+                        self.results.setdefault(shard_id, partial)
+                        self._lock.notify_all()
+                    shard_id = None
+                elif message[0] == "error":
+                    _, shard_id, error = message
+                    with self._lock:
+                        self.leases.pop(shard_id, None)
+                        self.attempts[shard_id] += 1
+                        if self.attempts[shard_id] >= self.max_attempts:
+                            self.error = f"shard {shard_id} failed {self.attempts[shard_id]} times:\n{error}"
+                        elif shard_id not in self.results:
+                            self.pending.append(shard_id)
+                        self._lock.notify_all()
+                    shard_id = None
+
+                shard_id = self._next_shard()
+                if shard_id is None:
+                    conn.send(("done",))
+                    return
+                conn.send(("shard", shard_id, self.kind, self.tasks[shard_id]))
+        except (EOFError, OSError):
+            if shard_id is not None:
+                self._release(shard_id)
+        finally:
+            conn.close()
+
+
+def run_worker(address, authkey=None, retry_seconds=30):
+    # Pulls shards from the coordinator at address until told to stop.
+    # Connection attempts are retried for retry_seconds so workers can be
+    # started before the coordinator.
+    authkey = resolve_authkey(authkey)
+    deadline = time.monotonic() + retry_seconds
+    while True:
+        try:
+            conn = Client(tuple(address), authkey=authkey)
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+    shards = 0
+    with conn:
+        conn.send(("ready",))
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break  # coordinator finished and went away
+            if message[0] == "done":
+                break
+            _, shard_id, kind, task = message
+            try:
+                partial = JOB_KINDS[kind][0](task)
+            except Exception:
+                conn.send(("error", shard_id, traceback.format_exc()))
+                continue
+            conn.send(("result", shard_id, partial))
+            shards += 1
+    return shards
+
+def run_sharded(kind, tasks, local_workers=0, address=("127.0.0.1", 0), authkey=None, **options):
+    """
+    Runs a job through a Coordinator. local_workers starts that many worker
+    processes on this machine (connecting over loopback, exactly as remote
+    ones would), which is also how to try the whole thing on one box.
+    Remote workers can only connect if address binds to a reachable
+    interface, e.g. ("0.0.0.0", 5000).
+    """
+    authkey = resolve_authkey(authkey)
+    coordinator = Coordinator(address, authkey, **options)
+    host, port = coordinator.address
+    connect_to = ("127.0.0.1" if host in ("0.0.0.0", "") else host, port)
+    workers = [
+        Process(target=run_worker, args=(connect_to, authkey), daemon=True)
+        for _ in range(local_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        return coordinator.run(kind, tasks)
+    finally:
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+
+def batch_shards(roster_data, home, away, start_seed=0, games=1000, shard_games=500,
+                 box_scores=False, player_distributions=False):
+    # The shard size, not the worker count, fixes the seed ranges
+    home_data = find_team_data(roster_data, home)
+    away_data = find_team_data(roster_data, away)
+    shards = -(-games // shard_games)
+    return [
+        (home_data, away_data, seed, count, box_scores, player_distributions)
+        for seed, count in split_seed_range(start_seed, games, shards)
+    ]
+
+def distributed_batch(roster_data, home, away, start_seed=0, games=1000, shard_games=500,
+                      local_workers=0, address=("127.0.0.1", 0), authkey=None, box_scores=False,
+                      player_distributions=False, **options):
+    # Same result as run_batch() over the same seed range
+    tasks = batch_shards(roster_data, home, away, start_seed, games, shard_games, box_scores, player_distributions)
+    return run_sharded("batch", tasks, local_workers, address, authkey, **options)
+
+
+def main(argv=None):
+    # python distributed.py worker HOST:PORT  (authkey from $FOOTBALL_SIM_AUTHKEY)
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] != "worker":
+        print("usage: distributed.py worker HOST:PORT", file=sys.stderr)
+        return 2
+    host, port = argv[1].rsplit(":", 1)
+    try:
+        authkey = resolve_authkey()
+    except ValueError as e:
+        print(f"distributed.py: {e}", file=sys.stderr)
+        return 2
+    shards = run_worker((host, int(port)), authkey)
+    print(f"worker finished {shards} shards")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,17 @@
-import random
 from play_functions import get_pass_yards, get_run_yards
 from game_functions import get_kick_attempt_range, get_punt_distance, apply_general_fatigue
-RUN_PASS_TABLE = {
-    1: [(3,  0.75), (6,  0.65), (10, 0.55), (float('inf'), 0.40)],
-    2: [(3,  0.70), (6,  0.50), (10, 0.40), (float('inf'), 0.25)],
-    3: [(3,  0.60), (6,  0.35), (10, 0.20), (float('inf'), 0.10)],
-    4: [(1,  0.55), (3,  0.35), (6,  0.20), (float('inf'), 0.05)],
-}
+from roster import rating_reads
+from game_context import shared_context
 
-def run_probability(down, to_go):
+def run_probability(down, to_go, ctx=shared_context):
     """Lookup run% by down & distance."""
-    for thresh, prob in RUN_PASS_TABLE.get(down, []):
+    for thresh, prob in ctx.constants.run_pass_table.get(down, []):
         if to_go <= thresh:
             return prob
     return 0.25
 
-def determine_offense_play(down, first_down, last_play_type=None, last_gain=0):
-    run_chance = run_probability(down, first_down)
+def determine_offense_play(down, first_down, last_play_type=None, last_gain=0, ctx=shared_context):
+    run_chance = run_probability(down, first_down, ctx)
 
     # Reward success
     if last_play_type == "run" and last_gain >= 6:
@@ -27,67 +22,109 @@ def determine_offense_play(down, first_down, last_play_type=None, last_gain=0):
     # Clamp between 0.1 and 0.9
     run_chance = max(0.1, min(0.9, run_chance))
 
-    return "run" if random.random() < run_chance else "pass"
+    return "run" if ctx.rng.random() < run_chance else "pass"
 
-def determine_defense_play(down, first_down):
+def determine_defense_play(down, first_down, ctx=shared_context):
+    rng = ctx.rng
     if down == 1:
         if first_down <= 3:
-            return "defend_run" if random.random() < 0.75 else "defend_pass"
+            return "defend_run" if rng.random() < 0.75 else "defend_pass"
         elif first_down <= 6:
-            return "defend_run" if random.random() < 0.6 else "defend_pass"
+            return "defend_run" if rng.random() < 0.6 else "defend_pass"
         elif first_down <= 10:
-            return "defend_pass" if random.random() < 0.55 else "defend_run"
+            return "defend_pass" if rng.random() < 0.55 else "defend_run"
         else:
-            return "defend_pass" if random.random() < 0.7 else "defend_run"
+            return "defend_pass" if rng.random() < 0.7 else "defend_run"
 
     elif down == 2:
         if first_down <= 3:
-            return "defend_run" if random.random() < 0.65 else "defend_pass"
+            return "defend_run" if rng.random() < 0.65 else "defend_pass"
         elif first_down <= 6:
-            return "defend_pass" if random.random() < 0.6 else "defend_run"
+            return "defend_pass" if rng.random() < 0.6 else "defend_run"
         elif first_down <= 10:
-            return "defend_pass" if random.random() < 0.7 else "defend_run"
+            return "defend_pass" if rng.random() < 0.7 else "defend_run"
         else:
-            return "defend_pass" if random.random() < 0.8 else "defend_run"
+            return "defend_pass" if rng.random() < 0.8 else "defend_run"
 
     elif down == 3:
         if first_down <= 3:
-            return "defend_run" if random.random() < 0.6 else "defend_pass"
+            return "defend_run" if rng.random() < 0.6 else "defend_pass"
         elif first_down <= 6:
-            return "defend_pass" if random.random() < 0.7 else "defend_run"
+            return "defend_pass" if rng.random() < 0.7 else "defend_run"
         elif first_down <= 10:
-            return "defend_pass" if random.random() < 0.85 else "defend_run"
+            return "defend_pass" if rng.random() < 0.85 else "defend_run"
         else:
-            return "defend_pass" if random.random() < 0.9 else "defend_run"
+            return "defend_pass" if rng.random() < 0.9 else "defend_run"
 
     else:
         return "defend_pass"
     
-def determine_line_advantage(offense, defense, offense_play, defense_play) :
+# Who counts on each side of determine_line_advantage(). The same tests pick
+# the players and tell the lineup cache which positions a sum covers.
+def _blocks(position, offense_play):
+    return position == 'OL' or offense_play == "run" and position == 'TE'
+
+def _rushes(position, defense_play):
+    return position == 'DL' or defense_play == "defend_run" and 'LB' in position
+
+BLOCKING_POSITIONS = {play: (lambda position, play=play: _blocks(position, play)) for play in ("run", "pass")}
+BLOCKING_READS = {
+    "run": rating_reads(BLOCKING_POSITIONS["run"], ("strength", "run_blocking")),
+    "pass": rating_reads(BLOCKING_POSITIONS["pass"], ("strength", "pass_blocking")),
+}
+PASS_RUSH_POSITIONS = {
+    play: (lambda position, play=play: _rushes(position, play)) for play in ("defend_run", "defend_pass")
+}
+PASS_RUSH_READS = {
+    play: rating_reads(positions, ("strength", "rushing")) for play, positions in PASS_RUSH_POSITIONS.items()
+}
+
+def _blocking(offense, offense_play):
     offense_blocking = 0
     for player in offense :
-        if player.position == 'OL' or offense_play == "run" and player.position == 'TE':
+        if _blocks(player.position, offense_play):
             offense_blocking += player.strength
             if offense_play == "run" :
                 offense_blocking += player.run_blocking
             elif offense_play == "pass" :
                 offense_blocking += player.pass_blocking
+    return offense_blocking
+
+def _pass_rush(defense, defense_play):
     defense_rushing = 0
     for player in defense :
-        if player.position == 'DL' or defense_play == "defend_run" and 'LB' in player.position:
+        if _rushes(player.position, defense_play):
             defense_rushing += player.strength
             if defense_play == "defend_run" :
                 defense_rushing += player.rushing
             elif defense_play == "defend_pass" :
                 defense_rushing += player.rushing
+    return defense_rushing
+
+BLOCKING = {play: (lambda lineup, play=play: _blocking(lineup, play)) for play in BLOCKING_POSITIONS}
+PASS_RUSH = {play: (lambda lineup, play=play: _pass_rush(lineup, play)) for play in PASS_RUSH_POSITIONS}
+
+def determine_line_advantage(offense, defense, offense_play, defense_play) :
+    # Both sums only change with the lineup or fatigue, so they are cached on
+    # the lineups per play call
+    offense_blocking = offense.aggregate(
+        ("blocking", offense_play), BLOCKING_POSITIONS[offense_play], BLOCKING_READS[offense_play],
+        BLOCKING[offense_play]
+    )
+    defense_rushing = defense.aggregate(
+        ("pass_rush", defense_play), PASS_RUSH_POSITIONS[defense_play], PASS_RUSH_READS[defense_play],
+        PASS_RUSH[defense_play]
+    )
     return offense_blocking - defense_rushing
     
-def sim_play(offense_team, defense_team, down, first_down_yardage, yardline, hurrying=False, last_play_type=None, last_gain=0, verbose=True) :
+def sim_play(offense_team, defense_team, down, first_down_yardage, yardline, hurrying=False, last_play_type=None, last_gain=0, verbose=True, ctx=shared_context) :
+    rng = ctx.rng
+    constants = ctx.constants
     apply_general_fatigue(offense_team.get_offense(), defense_team.get_defense())
     offense_team.apply_fatigue_penalties()
     defense_team.apply_fatigue_penalties()
-    offense_team.sub_skill_position_players(50)
-    defense_team.sub_defensive_players(50)
+    offense_team.sub_skill_position_players(offense_team.sub_threshold)
+    defense_team.sub_defensive_players(defense_team.sub_threshold)
     offense_team.recover_bench_players()
     defense_team.recover_bench_players()
     offense = offense_team.get_offense()
@@ -96,11 +133,11 @@ def sim_play(offense_team, defense_team, down, first_down_yardage, yardline, hur
     penalty_flag = False
     time_spent = 0
     if not hurrying:
-        time_spent = random.randint(25, 40)  # normal tempo
+        time_spent = rng.randint(25, 40)  # normal tempo
     else:
-        time_spent = random.randint(10, 25)
-    if random.random() < 0.08:  # 8% chance of offensive penalty
-            penalty_type = random.choices(
+        time_spent = rng.randint(10, 25)
+    if rng.random() < constants.offensive_penalty_rate:  # ~8% chance of offensive penalty
+            penalty_type = rng.choices(
                 ["false_start", "holding", "offensive_pass_interference", "delay_of_game"],
                 weights=[0.3, 0.4, 0.15, 0.15],
                 k=1
@@ -122,9 +159,9 @@ def sim_play(offense_team, defense_team, down, first_down_yardage, yardline, hur
                 print(f"Penalty: {penalty_type.replace('_', ' ').title()} for {abs(penalty_yards)} yards")
             return "penalty", "offensive penalty", penalty_yards, time_spent
     # --- Random Defensive Penalty Logic ---
-    if random.random() < 0.05 and not penalty_flag:  # ~5% chance
+    if rng.random() < constants.defensive_penalty_rate and not penalty_flag:  # ~5% chance
             penalty_flag = True
-            penalty_type = random.choices(
+            penalty_type = rng.choices(
                 ["offside", "pass_interference", "facemask"],
                 weights=[0.4, 0.4, 0.2],
                 k=1
@@ -134,7 +171,7 @@ def sim_play(offense_team, defense_team, down, first_down_yardage, yardline, hur
                 yardline = min(99, yardline + 5)
                 penalty_yards -= 5
             elif penalty_type == "pass_interference":
-                gain = random.randint(10, 25)
+                gain = rng.randint(10, 25)
                 penalty_yards = gain  # reset first down
             elif penalty_type == "facemask":
                 penalty_yards = 15
@@ -144,15 +181,15 @@ def sim_play(offense_team, defense_team, down, first_down_yardage, yardline, hur
             return "penalty", "defensive penalty", penalty_yards, time_spent
 
     elif not penalty_flag :
-        offense_play = determine_offense_play(down, first_down_yardage, last_play_type, last_gain)
-        defense_play = determine_defense_play(down, first_down_yardage)
+        offense_play = determine_offense_play(down, first_down_yardage, last_play_type, last_gain, ctx)
+        defense_play = determine_defense_play(down, first_down_yardage, ctx)
         offense_line_advantage = determine_line_advantage(offense, defense, offense_play, defense_play)
         guessed_play = offense_play in defense_play
         play_ran = "run"
         if offense_play == "run":
-            result, yards_gained = get_run_yards(offense, defense, down, first_down_yardage, guessed_play, offense_line_advantage, yardline)
+            result, yards_gained = get_run_yards(offense, defense, down, first_down_yardage, guessed_play, offense_line_advantage, yardline, ctx=ctx)
         elif offense_play == "pass":
-            result, yards_gained = get_pass_yards(offense, defense, down, first_down_yardage, guessed_play, offense_line_advantage, yardline)
+            result, yards_gained = get_pass_yards(offense, defense, down, first_down_yardage, guessed_play, offense_line_advantage, yardline, ctx=ctx)
             play_ran = "pass"
         return(play_ran, result, yards_gained, time_spent)
 
@@ -191,20 +228,21 @@ def process_play(result, play_type, yards, yardline, down, first_down_yardage) :
         down = 6
     return down, first_down_yardage, yardline
 
-def should_go_for_it(distance, yardline):
+def should_go_for_it(distance, yardline, ctx=shared_context):
+    rng = ctx.rng
     # Never go for it in own territory unless it's short and late in game
     if yardline < 50:
-        return distance <= 1 and random.random() < 0.3
+        return distance <= 1 and rng.random() < 0.3
     # 4th and short in enemy territory
     if distance <= 2 and yardline >= 50 and yardline < 70:
-        return random.random() < 0.5
+        return rng.random() < 0.5
 
     if yardline > 85:
-        return distance <= 5 and random.random() < 0.6
+        return distance <= 5 and rng.random() < 0.6
 
     return False
 
-def attempt_kick(yardline, kicker) :
+def attempt_kick(yardline, kicker, ctx=shared_context) :
     kicker.stats["fg_attempted"] += 1
     kick_make_chance = 1
     kick_distance = (100 - yardline)+17
@@ -219,13 +257,14 @@ def attempt_kick(yardline, kicker) :
     else:
         kick_make_chance = 0.4
     kick_make_chance = max(0.05, min(1.0, kick_make_chance + ((kicker.kick_accuracy - 50)*0.005)))
-    kick_made = True if random.random() < kick_make_chance else False
+    kick_made = True if ctx.rng.random() < kick_make_chance else False
     if kick_made :
         kicker.stats["fg_made"] += 1
     return kick_made
 
-def attempt_punt(yardline, punter):
-    punt_distance = get_punt_distance(punter)
+def attempt_punt(yardline, punter, ctx=shared_context):
+    rng = ctx.rng
+    punt_distance = get_punt_distance(punter, ctx)
     punt_accuracy = punter.punt_accuracy  # default to 50 if missing
 
     landing_spot = yardline + punt_distance
@@ -242,8 +281,8 @@ def attempt_punt(yardline, punter):
     pin_chance = 0.25 + accuracy_factor
 
     if landing_spot >= 95:  # Ball lands inside the 5
-        if random.random() < pin_chance:
-            pinned_spot = random.randint(1, 4)  # Stick inside the 5
+        if rng.random() < pin_chance:
+            pinned_spot = rng.randint(1, 4)  # Stick inside the 5
             punter.stats["punt_yards"] += (100 - pinned_spot - yardline)
             return 100 - pinned_spot, 100 - pinned_spot - yardline
         else:
@@ -251,45 +290,77 @@ def attempt_punt(yardline, punter):
             return 80, 100 - yardline - 20  # Ball placed at 20
 
     # Else: standard returnable punt
-    return_yards = random.randint(0, 15) if landing_spot < 90 else 0
+    return_yards = rng.randint(0, 15) if landing_spot < 90 else 0
     final_spot = max(landing_spot - return_yards, 1)
     punter.stats["punt_yards"] += (final_spot - yardline)
     return final_spot, final_spot - yardline
 
-def sim_drive(offense, defense, down, first_down_yardage, yardline, seconds_remaining, hurrying=False, verbose=True) :
+def play_out(plays):
+    # Runs one of the *_plays generators to the end and returns its result
+    while True:
+        try:
+            next(plays)
+        except StopIteration as done:
+            return done.value
+
+def sim_drive(offense, defense, down, first_down_yardage, yardline, seconds_remaining, hurrying=False, verbose=True, play_log=None, ctx=shared_context) :
+    # play_log: optional play_log.PlayLog that gets every snap, kick and punt
+    return play_out(drive_plays(offense, defense, down, first_down_yardage, yardline, seconds_remaining, hurrying, verbose, play_log, ctx))
+
+def drive_plays(offense, defense, down, first_down_yardage, yardline, seconds_remaining, hurrying=False, verbose=True, play_log=None, ctx=shared_context) :
+    # sim_drive() as a generator: yields the game seconds each snap, kick or
+    # punt took, right after it is played, and returns sim_drive()'s result.
+    # Lets a caller pace or interleave games play by play.
+    rng = ctx.rng
     kicker = next(p for p in offense.get_offense() if p.position == 'K')
     punter = next(p for p in offense.get_offense() if p.position == 'P')
     last_play_type =  None
     last_gain = 0
+    play_ran = None
     result = ""
     while down < 4 :
         if verbose :
             print(down, "and", first_down_yardage, "at the", yardline)
-        play_ran, result, yards_gained, time = sim_play(offense, defense, down, first_down_yardage, yardline, hurrying, last_play_type, last_gain, False)
+        play_ran, result, yards_gained, time = sim_play(offense, defense, down, first_down_yardage, yardline, hurrying, last_play_type, last_gain, False, ctx)
+        snap = (down, first_down_yardage, yardline, seconds_remaining)
         seconds_remaining -= time
         down, first_down_yardage, yardline = process_play(result, play_ran, yards_gained, yardline, down, first_down_yardage)
+        if play_log is not None:
+            play_log.record_play(offense, defense, *snap, play_ran, result, yards_gained, down == 6)
+        yield time
     if down == 4 :
-        if should_go_for_it(first_down_yardage, yardline) :
-            play_ran, result, yards_gained, time = sim_play(offense, defense, down, first_down_yardage, yardline, hurrying, last_play_type, last_gain, False)
+        if should_go_for_it(first_down_yardage, yardline, ctx) :
+            play_ran, result, yards_gained, time = sim_play(offense, defense, down, first_down_yardage, yardline, hurrying, last_play_type, last_gain, False, ctx)
+            snap = (down, first_down_yardage, yardline, seconds_remaining)
             seconds_remaining -= time
             down, first_down_yardage, yardline = process_play(result, play_ran, yards_gained, yardline, down, first_down_yardage)
+            if play_log is not None:
+                play_log.record_play(offense, defense, *snap, play_ran, result, yards_gained, down == 6)
+            yield time
         else :
+            snap = (down, first_down_yardage, yardline, seconds_remaining)
             if yardline >= get_kick_attempt_range(kicker):
-                kick_time = random.randint(5, 7)
+                kick_time = rng.randint(5, 7)
                 seconds_remaining -= kick_time
-                if attempt_kick(yardline, kicker):
+                if attempt_kick(yardline, kicker, ctx):
                     if verbose:
                         print((100 - yardline)+17, "yard kick is good!")
                     result = "field goal"
                 else :
                     result = "missed kick"
+                if play_log is not None:
+                    play_log.record_kick(offense, defense, kicker, *snap, "field_goal", result, (100 - yardline)+17)
+                yield kick_time
             else:
-                yardline, punt_distance = attempt_punt(yardline, punter)
-                punt_time = random.randint(6, 10)
+                yardline, punt_distance = attempt_punt(yardline, punter, ctx)
+                punt_time = rng.randint(6, 10)
                 seconds_remaining -= punt_time
                 if verbose:
                     print(punt_distance, "yard punt.")
                 result = "punt"
+                if play_log is not None:
+                    play_log.record_kick(offense, defense, punter, *snap, "punt", result, punt_distance)
+                yield punt_time
     if down == 5 :
         result = "turnover"
     if down == 6 :
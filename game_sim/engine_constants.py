@@ -0,0 +1,104 @@
+import json
+import os
+
+# Tunable engine constants. The engine reads them from the shared `constants`
+# instance below, which is loaded from engine_constants.json at import; the
+# calibration script fits them and writes a new version of that file.
+#
+# engine_constants.json:
+# {
+#   "format": 1,
+#   "version": 3,                # bumped on every save
+#   "calibration": {...},        # how the values were fitted, if they were
+#   "constants": {name: value}   # any subset of DEFAULT_CONSTANTS
+# }
+#
+# run_pass_table maps down -> [[max yards to go, run probability], ...]; a
+# null max stands for "any distance".
+
+CONSTANTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "engine_constants.json")
+CONSTANTS_FORMAT = 1
+
+DEFAULT_CONSTANTS = {
+    "base_run_yards": 4.5,
+    "completion_baseline": 0.35,
+    "sack_rate_base": 0.005,
+    "sack_rate_per_down": 0.005,
+    "offensive_penalty_rate": 0.08,
+    "defensive_penalty_rate": 0.05,
+    "run_pass_table": {
+        "1": [[3, 0.75], [6, 0.65], [10, 0.55], [None, 0.40]],
+        "2": [[3, 0.70], [6, 0.50], [10, 0.40], [None, 0.25]],
+        "3": [[3, 0.60], [6, 0.35], [10, 0.20], [None, 0.10]],
+        "4": [[1, 0.55], [3, 0.35], [6, 0.20], [None, 0.05]],
+    },
+}
+
+
+class EngineConstants:
+    """
+    Attribute access to the constant values, e.g. constants.base_run_yards.
+    run_pass_table is kept in the engine's form: {down: [(max to go, run
+    probability), ...]} with int downs and inf for "any distance".
+    """
+
+    def __init__(self, values=None, version=0):
+        self.version = version
+        self.update(DEFAULT_CONSTANTS)
+        if values:
+            self.update(values)
+
+    def update(self, values):
+        for name, value in values.items():
+            if name not in DEFAULT_CONSTANTS:
+                raise ValueError(f"unknown engine constant {name!r}")
+            if name == "run_pass_table":
+                value = {
+                    int(down): [(float("inf") if limit is None else limit, prob) for limit, prob in rows]
+                    for down, rows in value.items()
+                }
+            setattr(self, name, value)
+
+    def to_dict(self):
+        values = {name: getattr(self, name) for name in DEFAULT_CONSTANTS}
+        values["run_pass_table"] = {
+            str(down): [[None if limit == float("inf") else limit, prob] for limit, prob in rows]
+            for down, rows in self.run_pass_table.items()
+        }
+        return values
+
+
+def read_constants_file(path=CONSTANTS_PATH):
+    # The parsed file, or an empty version 0 if there is none
+    if not os.path.exists(path):
+        return {"format": CONSTANTS_FORMAT, "version": 0, "constants": {}}
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("format") != CONSTANTS_FORMAT:
+        raise ValueError(f"{path}: unsupported constants format {data.get('format')!r}")
+    return data
+
+def load_constants(path=CONSTANTS_PATH):
+    data = read_constants_file(path)
+    return EngineConstants(data.get("constants"), data.get("version", 0))
+
+def save_constants(values, path=CONSTANTS_PATH, calibration=None):
+    """
+    Writes values (any subset of DEFAULT_CONSTANTS) as the next version of the
+    constants file and returns that version number.
+    """
+    checked = EngineConstants(values).to_dict()
+    version = read_constants_file(path).get("version", 0) + 1
+    data = {"format": CONSTANTS_FORMAT, "version": version}
+    if calibration is not None:
+        data["calibration"] = calibration
+    data["constants"] = checked
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+    return version
+
+# The engine's constants, as of startup
+constants = load_constants()
@@ -0,0 +1,56 @@
+import random
+from bisect import bisect
+from math import isfinite
+
+# Streams: one generator per game, seeded with the game's own seed. Batches,
+# thread pools, process pools and distributed workers all play game i of a
+# range as GameContext.seeded(start_seed + i), so a game depends only on its
+# seed, never on which worker or machine plays it or what ran before. That
+# per-game seeding is the engine's only stream separation; there is no
+# per-worker stream API. CPython's seeding (init_by_array) spreads even
+# consecutive integer seeds over the whole Mersenne Twister state.
+
+class EngineRandom(random.Random):
+    """
+    Random number generator for the game engine. Engine functions draw from
+    their GameContext's instance (the shared `rng` below by default) rather
+    than the random module's hidden global, so a game is reproducible from
+    its seed alone.
+
+    Seeding and the underlying Mersenne Twister are the stdlib's, and the
+    overrides below consume the stream exactly as random.Random does and
+    raise the same errors, so a seed gives the same game it always has. They
+    make no measurable difference to whole-game time.
+    """
+
+    def randint(self, a, b):
+        # randrange(a, b + 1) without the argument coercion
+        n = b - a + 1
+        if n <= 0:
+            raise ValueError(f"empty range for randint({a}, {b})")
+        getrandbits = self.getrandbits
+        k = n.bit_length()
+        r = getrandbits(k)
+        while r >= n:
+            r = getrandbits(k)
+        return a + r
+
+    def choices(self, population, weights=None, *, cum_weights=None, k=1):
+        # A single pick from precomputed cumulative weights is the common
+        # case on the hot path; everything else goes through the stdlib
+        if k == 1 and cum_weights is not None and weights is None:
+            return [self.weighted_choice(population, cum_weights)]
+        return super().choices(population, weights, cum_weights=cum_weights, k=k)
+
+    def weighted_choice(self, population, cum_weights):
+        # choices(population, cum_weights=cum_weights)[0] without the list,
+        # raising the same errors for a zero, negative or non-finite total
+        total = cum_weights[-1] + 0.0
+        if total <= 0.0:
+            raise ValueError("Total of weights must be greater than zero")
+        if not isfinite(total):
+            raise ValueError("Total of weights must be finite")
+        return population[bisect(cum_weights, self.random() * total, 0, len(population) - 1)]
+
+# The engine's generator; batches call rng.seed(seed) before each game
+rng = EngineRandom()
@@ -0,0 +1,269 @@
+import argparse
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Statistical equivalence check between two engine trees, e.g. HEAD and the
+# working copy after a performance change:
+#
+#   python equivalence.py                       # working tree vs HEAD, 2000 games
+#   python equivalence.py --reference main -n 5000 -w 4
+#
+# Both engines play the same seed range. Each shard runs in its own
+# subprocess with the engine's directory first on sys.path, so the two trees
+# never share imported modules. A shard only needs batch.sim_seeded_game()
+# from the engine, which every tree since the batch runner has.
+#
+# Per team-game distributions (points, yards per play, completion %,
+# turnovers, sacks) and per-game player shares of team carries, targets and
+# tackles are compared with a two-sample Kolmogorov-Smirnov test and Welch's
+# t-test. A metric fails when a test rejects at alpha (Bonferroni-corrected
+# over all metrics) and the difference in means is also outside its
+# tolerance band; a significant difference inside the band is only a warning.
+# A pure refactor that keeps the random stream intact gives identical games,
+# which is reported as such.
+
+ENGINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else None
+
+# name -> (value from a team's box score stats and score, relative tolerance)
+TEAM_METRICS = {
+    "points": (lambda stats, score: score, 0.03),
+    "yards_per_play": (lambda stats, score: _ratio(
+        stats["Pass Yards"] + stats["Rush Yards"],
+        stats["Pass Attempts"] + stats["Carries"] + stats["Sacks Taken"]
+    ), 0.03),
+    "completion_pct": (lambda stats, score: _ratio(stats["Completions"], stats["Pass Attempts"]), 0.02),
+    "turnovers": (lambda stats, score: stats["Interceptions Thrown"] + stats["Fumbles"], 0.08),
+    "sacks_taken": (lambda stats, score: stats["Sacks Taken"], 0.08),
+}
+
+# Player stats compared as a share of the team's total in each game
+SHARE_STATS = ("carries", "targets", "tackles")
+# Absolute tolerance on a player's mean share, and the smallest mean share
+# (in either engine) for a player to be compared at all
+SHARE_TOLERANCE = 0.02
+MIN_SHARE = 0.05
+
+
+def _game_summary(home_team, away_team, box):
+    # Compact per-game record: team metrics per side, and player shares keyed
+    # "team|player|stat"
+    summary = {"teams": {}, "shares": {}}
+    for side, team in (("team1", home_team), ("team2", away_team)):
+        stats, score = box[side]["stats"], box[side]["score"]
+        summary["teams"][side] = {name: metric(stats, score) for name, (metric, _) in TEAM_METRICS.items()}
+        for stat in SHARE_STATS:
+            players = [p for p in team.offense + team.defense if stat in p.stats]
+            total = sum(p.stats[stat] for p in players)
+            if not total:
+                continue
+            for player in players:
+                if player.stats[stat]:
+                    summary["shares"][f"{team.name}|{player.name}|{stat}"] = player.stats[stat] / total
+    return summary
+
+def _run_shard(roster_path, home, away, start_seed, games):
+    # Runs inside the engine's own interpreter (see main)
+    from batch import sim_seeded_game
+    from roster import find_team_data, load_roster_data
+    roster_data = load_roster_data(roster_path)
+    home_data = find_team_data(roster_data, home)
+    away_data = find_team_data(roster_data, away)
+    return [
+        _game_summary(*sim_seeded_game(home_data, away_data, seed))
+        for seed in range(start_seed, start_seed + games)
+    ]
+
+
+def export_engine(ref, directory):
+    # Extracts this directory as of git ref into directory. Run from a
+    # subdirectory, git archive only includes that subdirectory, with paths
+    # relative to it.
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", ref, "."], cwd=ENGINE_DIR, check=True, capture_output=True
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    return directory
+
+def simulate(engine_dir, roster_path, home, away, start_seed, games, workers=1, shard_games=250):
+    # Game summaries for the seed range, in seed order, from the engine in engine_dir
+    shards = [
+        (seed, min(shard_games, start_seed + games - seed))
+        for seed in range(start_seed, start_seed + games, shard_games)
+    ]
+
+    def run(shard):
+        seed, count = shard
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--shard", engine_dir, roster_path,
+             str(home), str(away), str(seed), str(count)],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"shard {seed}+{count} failed in {engine_dir}:\n{result.stderr}")
+        return json.loads(result.stdout)
+
+    summaries = []
+    with ThreadPoolExecutor(max(1, workers)) as executor:
+        for part in executor.map(run, shards):
+            summaries.extend(part)
+    return summaries
+
+
+def _mean_var(sample):
+    n = len(sample)
+    mean = sum(sample) / n
+    var = sum((x - mean) ** 2 for x in sample) / (n - 1) if n > 1 else 0.0
+    return mean, var
+
+def welch_test(a, b):
+    # (t, two-sided p). p uses the normal approximation, which is fine at
+    # the sample sizes this runs with (hundreds of games and up)
+    mean_a, var_a = _mean_var(a)
+    mean_b, var_b = _mean_var(b)
+    se = math.sqrt(var_a / len(a) + var_b / len(b))
+    if se == 0:
+        return 0.0, 1.0 if mean_a == mean_b else 0.0
+    t = (mean_a - mean_b) / se
+    return t, math.erfc(abs(t) / math.sqrt(2))
+
+def ks_test(a, b):
+    # (D, p) for the two-sample Kolmogorov-Smirnov test with the asymptotic
+    # p-value. Conservative for discrete stats like points.
+    a, b = sorted(a), sorted(b)
+    n, m = len(a), len(b)
+    i = j = 0
+    d = 0.0
+    while i < n and j < m:
+        x = min(a[i], b[j])
+        while i < n and a[i] == x:
+            i += 1
+        while j < m and b[j] == x:
+            j += 1
+        d = max(d, abs(i / n - j / m))
+    en = math.sqrt(n * m / (n + m))
+    lam = (en + 0.12 + 0.11 / en) * d
+    if lam < 1e-3:
+        return d, 1.0
+    p = 2 * sum((-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam) for k in range(1, 101))
+    return d, min(1.0, max(0.0, p))
+
+
+def _team_samples(summaries, name):
+    return [
+        team[name] for summary in summaries for team in summary["teams"].values() if team[name] is not None
+    ]
+
+def _share_samples(summaries, key):
+    # A player with no share in a game had a share of 0 in it
+    return [summary["shares"].get(key, 0.0) for summary in summaries]
+
+def compare(reference, candidate, alpha=0.01, tolerance_scale=1.0):
+    """
+    Compares two lists of game summaries. Returns a list of per-metric
+    result dicts with a "status" of "ok", "warn" or "fail".
+    """
+    checks = []
+    for name, (_, tolerance) in TEAM_METRICS.items():
+        checks.append((name, _team_samples(reference, name), _team_samples(candidate, name), tolerance, True))
+
+    keys = set()
+    for summaries in (reference, candidate):
+        for summary in summaries:
+            keys.update(summary["shares"])
+    for key in sorted(keys):
+        ref_sample = _share_samples(reference, key)
+        cand_sample = _share_samples(candidate, key)
+        if max(sum(ref_sample) / len(ref_sample), sum(cand_sample) / len(cand_sample)) >= MIN_SHARE:
+            checks.append((key, ref_sample, cand_sample, SHARE_TOLERANCE, False))
+
+    corrected_alpha = alpha / max(len(checks), 1)
+    results = []
+    for name, ref_sample, cand_sample, tolerance, relative in checks:
+        ref_mean, _ = _mean_var(ref_sample)
+        cand_mean, _ = _mean_var(cand_sample)
+        diff = cand_mean - ref_mean
+        band = tolerance * tolerance_scale * (abs(ref_mean) if relative else 1.0)
+        _, welch_p = welch_test(cand_sample, ref_sample)
+        ks_d, ks_p = ks_test(cand_sample, ref_sample)
+        significant = min(welch_p, ks_p) < corrected_alpha
+        if not significant:
+            status = "ok"
+        elif abs(diff) > band:
+            status = "fail"
+        else:
+            status = "warn"
+        results.append({
+            "metric": name, "reference": ref_mean, "candidate": cand_mean, "diff": diff, "band": band,
+            "welch_p": welch_p, "ks_d": ks_d, "ks_p": ks_p, "status": status,
+        })
+    return results
+
+def format_report(results, identical=False, show_all=False):
+    lines = []
+    if identical:
+        lines.append("candidate played every game identically to the reference")
+    lines.append(f"{'metric':<44}{'ref':>9}{'cand':>9}{'diff':>9}{'band':>8}{'welch p':>9}{'ks p':>9}  status")
+    for result in results:
+        if not show_all and result["status"] == "ok" and "|" in result["metric"]:
+            continue
+        lines.append(
+            f"{result['metric'][:43]:<44}{result['reference']:>9.3f}{result['candidate']:>9.3f}"
+            f"{result['diff']:>+9.3f}{result['band']:>8.3f}{result['welch_p']:>9.4f}{result['ks_p']:>9.4f}"
+            f"  {result['status']}"
+        )
+    counts = {status: sum(r["status"] == status for r in results) for status in ("ok", "warn", "fail")}
+    lines.append(f"{len(results)} metrics: {counts['ok']} ok, {counts['warn']} warn, {counts['fail']} fail")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "--shard":
+        # Internal: python equivalence.py --shard ENGINE_DIR ROSTER HOME AWAY START GAMES
+        engine_dir, roster_path, home, away, start_seed, games = argv[1:]
+        sys.path[0] = engine_dir
+        parse = lambda team: int(team) if team.isdigit() else team
+        json.dump(_run_shard(roster_path, parse(home), parse(away), int(start_seed), int(games)), sys.stdout)
+        return 0
+
+    parser = argparse.ArgumentParser(description="Check that a candidate engine plays like a reference engine.")
+    parser.add_argument("--reference", default="HEAD", help="git ref of the reference engine (default: HEAD)")
+    parser.add_argument("--reference-dir", help="reference engine directory, instead of a git ref")
+    parser.add_argument("--candidate-dir", default=ENGINE_DIR, help="candidate engine directory (default: this tree)")
+    parser.add_argument("--roster", help="roster JSON file (default: rosters.json in the candidate tree)")
+    parser.add_argument("--home", default="0", help="home team name or index (default: 0)")
+    parser.add_argument("--away", default="1", help="away team name or index (default: 1)")
+    parser.add_argument("-n", "--games", type=int, default=2000, help="games per engine (default: 2000)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="parallel shard processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="first seed (default: 0)")
+    parser.add_argument("--alpha", type=float, default=0.01, help="family-wise significance level (default: 0.01)")
+    parser.add_argument("--tolerance-scale", type=float, default=1.0, help="multiply every tolerance band")
+    parser.add_argument("--all", action="store_true", help="list passing player-share metrics too")
+    args = parser.parse_args(argv)
+
+    roster_path = os.path.abspath(args.roster or os.path.join(args.candidate_dir, "rosters.json"))
+    with tempfile.TemporaryDirectory() as tmp:
+        reference_dir = args.reference_dir or export_engine(args.reference, tmp)
+        engines = (os.path.abspath(reference_dir), os.path.abspath(args.candidate_dir))
+        reference, candidate = (
+            simulate(engine, roster_path, args.home, args.away, args.seed, args.games, args.workers)
+            for engine in engines
+        )
+    results = compare(reference, candidate, args.alpha, args.tolerance_scale)
+    print(format_report(results, identical=reference == candidate, show_all=args.all))
+    return 1 if any(result["status"] == "fail" for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
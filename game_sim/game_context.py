@@ -0,0 +1,37 @@
+import engine_constants
+import engine_random
+
+# Per-game engine state. Everything a game mutates lives either on its two
+# Teams (players' fatigue, lineups, stats) or on its GameContext (the random
+# stream), and every engine function that draws a random number or reads a
+# constant takes the context as ctx. Games with their own teams and contexts
+# share nothing mutable, so they can be played at the same time in threads.
+#
+# What games do share is read-only or safe to race on: the constants object
+# (never written while games run), module-level tables, and the memo caches
+# in roster.py, where two threads missing the cache at once just compute the
+# same value twice.
+#
+# Engine functions default to shared_context, the process-wide
+# engine_random.rng and engine_constants.constants, so single-threaded code
+# can keep calling rng.seed(seed) and play_game() without one.
+
+
+class GameContext:
+    """
+    A game's random stream and the engine constants it is played with.
+    GameContext.seeded(seed) plays the same game rng.seed(seed) does.
+    """
+
+    __slots__ = ("rng", "constants")
+
+    def __init__(self, rng=None, constants=None):
+        self.rng = rng if rng is not None else engine_random.EngineRandom()
+        self.constants = constants if constants is not None else engine_constants.constants
+
+    @classmethod
+    def seeded(cls, seed, constants=None):
+        return cls(engine_random.EngineRandom(seed), constants)
+
+
+shared_context = GameContext(engine_random.rng, engine_constants.constants)
@@ -1,18 +1,21 @@
-import random
+from itertools import chain
+from game_context import shared_context
 from collections import defaultdict
+from roster import PASS_COVERAGE, RUN_FRONT, SKILL_OFFENSE
 
-def sim_kickoff(kicker):
+def sim_kickoff(kicker, ctx=shared_context):
+    rng = ctx.rng
     kick_power = kicker.kick_power
     kick_accuracy = kicker.kick_accuracy
 
     # Landing distance
     base_distance = 45 + (kick_power * 0.5)
-    variance = random.uniform(-5, 5)
+    variance = rng.uniform(-5, 5)
     landing_yard = min(max(base_distance + variance, 0), 100)
 
     # Out-of-bounds probability
     out_of_bounds_chance = max(0.15 - (kick_accuracy / 100) * 0.15, 0.01)
-    if random.random() < out_of_bounds_chance:
+    if rng.random() < out_of_bounds_chance:
         return 40
 
     # Touchback
@@ -20,23 +23,23 @@ def sim_kickoff(kicker):
         return 25
 
     # Fair catch
-    if random.random() < 0.1:
+    if rng.random() < 0.1:
         return 100 - round(landing_yard)
 
     # Return
-    return_yards = random.randint(10, 35)
+    return_yards = rng.randint(10, 35)
     end_yard = 100 - landing_yard
     end_yard += return_yards
     return round(end_yard)
 
-def sim_pat(kicker, verbose=False):
+def sim_pat(kicker, verbose=False, ctx=shared_context):
     base_chance = 0.94  # baseline PAT success rate (~94%)
     
     # Adjust based on kicker accuracy (scale 50 = avg, 100 = elite)
     accuracy_adjustment = (kicker.kick_accuracy - 50) * 0.005
     make_chance = max(0.80, min(0.99, base_chance + accuracy_adjustment))
     kicker.stats["pat_attempts"] += 1
-    made = random.random() < make_chance
+    made = ctx.rng.random() < make_chance
     if made :
         kicker.stats["pat_made"] += 1
     if verbose:
@@ -51,77 +54,60 @@ def get_kick_attempt_range(kicker) :
     kick_range = 65
     return (round(kick_range - (kicker.kick_power - 50)/5))
 
-def get_punt_distance(punter) :
-    punt_distance = int(random.gauss(47, 4))
+def get_punt_distance(punter, ctx=shared_context) :
+    punt_distance = int(ctx.rng.gauss(47, 4))
     return (round(punt_distance + (punter.punt_power - 50)/5)) 
 
-def apply_baseline_fatigue(team):
+def apply_baseline_fatigue(team, ctx=shared_context):
+    rng = ctx.rng
     for player in team.offense + team.defense:
         base_chance = (100 - player.endurance) / 10  # chance out of 100
-        if random.random() < base_chance / 100:
+        if rng.random() < base_chance / 100:
             max_fatigue = base_chance  # cap fatigue by same amount
-            player.fatigue = random.randint(1, round(max_fatigue))
+            player.fatigue = rng.randint(1, max(1, round(max_fatigue)))
         else:
             player.fatigue = 0
 
-def apply_general_fatigue(offense, defense):
-    skill_positions = {'RB', 'TE', 'WR', 'CB', 'OLB', 'MLB', 'ROLB', 'S'}
-    
-    for player in offense + defense:
-        if player.position in skill_positions:
-            base_fatigue = 1.8  # skill players exert more per play
-        else:
-            base_fatigue = 0.1  # linemen/special teams, etc.
+# The fatigue passes below run every play. Position checks and endurance
+# ratios are precomputed per player at load (roster.fatigue_profile), so
+# each is one loop of bit tests and additions over the players on the field.
 
-        endurance_factor = (100 - player.endurance) / 100  # 0.0–1.0
-        fatigue = base_fatigue + (endurance_factor * base_fatigue)
-        player.fatigue = min(100, player.fatigue + fatigue)
+def apply_general_fatigue(offense, defense):
+    # Skill players exert more per play than linemen/special teams
+    for player in chain(offense, defense):
+        player.fatigue = min(100, player.fatigue + player.general_fatigue)
 
 def apply_pass_fatigue(offense, defense, receiver=None, yards=0):
     # Apply fatigue to offensive skill players
     for player in offense:
-        if player.position not in ("WR", "RB", "TE"):
-            continue
-
-        base_fatigue = 1 + (100 - player.endurance) / 80
-
-        if receiver is not None and player == receiver:
-            effort = 1 + (yards / 10)
-            fatigue = base_fatigue + effort * (1 + (100 - player.endurance) / 100)
-        else:
-            fatigue = base_fatigue
-
-        player.fatigue = min(100, player.fatigue + round(fatigue))
-
-    # Apply lighter fatigue to defensive coverage players
+        if player.fatigue_class & SKILL_OFFENSE:
+            if player is receiver:
+                effort = 1 + (yards / 10)
+                fatigue = round(player.skill_fatigue + effort * player.effort_fatigue)
+            else:
+                fatigue = player.pass_idle_fatigue
+            player.fatigue = min(100, player.fatigue + fatigue)
+
+    # Apply lighter fatigue to defensive coverage players (~0.5–1.3)
     for player in defense:
-        if player.position not in ("CB", "S", "OLB", "MLB", "ROLB", "LOLB"):
-            continue
-
-        fatigue = 0.5 + (100 - player.endurance) / 120  # ~0.5–1.3 range
-        player.fatigue = min(100, player.fatigue + round(fatigue, 1))
+        if player.fatigue_class & PASS_COVERAGE:
+            player.fatigue = min(100, player.fatigue + player.coverage_fatigue)
 
 def apply_run_fatigue(offense, defense, rusher=None, yards=0):
     # Apply fatigue to offensive skill players
     for player in offense:
-        if player.position not in ("RB", "WR", "TE"):
-            continue
-
-        base_fatigue = 1 + (100 - player.endurance) / 80  # ~1–2.25
-
-        if rusher is not None and player == rusher:
-            effort = 1 + (yards / 7)  # Runs are more tiring per yard than catches
-            fatigue = base_fatigue + effort * (1 + (100 - player.endurance) / 100)
-        else:
-            fatigue = base_fatigue * 0.75  # lighter if just blocking/running a decoy route
-
-        player.fatigue = min(100, player.fatigue + round(fatigue))
-
-    # Apply fatigue to front-seven defenders
+        if player.fatigue_class & SKILL_OFFENSE:
+            if player is rusher:
+                effort = 1 + (yards / 7)  # Runs are more tiring per yard than catches
+                fatigue = round(player.skill_fatigue + effort * player.effort_fatigue)
+            else:
+                fatigue = player.run_idle_fatigue  # lighter if just blocking/running a decoy route
+            player.fatigue = min(100, player.fatigue + fatigue)
+
+    # Apply fatigue to front-seven defenders, slightly higher than pass D
     for player in defense:
-        if player.position in ("DL", "OLB", "MLB", "ROLB", "LOLB", "S"):
-            fatigue = 0.6 + (100 - player.endurance) / 110  # slightly higher than pass D
-            player.fatigue = min(100, player.fatigue + round(fatigue, 1))
+        if player.fatigue_class & RUN_FRONT:
+            player.fatigue = min(100, player.fatigue + player.run_front_fatigue)
 
 def summarize_stats(team):
     stat_totals = defaultdict(int)
@@ -0,0 +1,63 @@
+SCALAR_FIELDS = (
+    "half", "seconds_remaining", "home_score", "away_score",
+    "possession", "down", "distance", "yardline", "second_half_receiver"
+)
+
+class GameState:
+    """
+    Everything needed to pick a game up from the middle: both rosters (with
+    fatigue, lineups and stats living on the Player objects), the score, the
+    clock, who has the ball and the down/distance/yardline.
+
+    Two ways to branch:
+    - clone() gives an independent copy. Player ratings are shared with the
+      original and only the per-game fields (fatigue, in_game, stats and
+      fatigue-penalised ratings) are copied.
+    - snapshot() freezes the mutable state into tuples and restore() writes
+      it back, so thousands of what-if continuations can reuse one scratch
+      state without allocating any Player objects.
+    """
+
+    def __init__(self, home, away, half=1, seconds_remaining=2400, home_score=0, away_score=0,
+                 possession="home", down=1, distance=10, yardline=25, second_half_receiver="away"):
+        self.home = home
+        self.away = away
+        self.half = half
+        self.seconds_remaining = seconds_remaining
+        self.home_score = home_score
+        self.away_score = away_score
+        self.possession = possession
+        self.down = down
+        self.distance = distance
+        self.yardline = yardline
+        self.second_half_receiver = second_half_receiver
+
+    def offense(self):
+        return self.home if self.possession == "home" else self.away
+
+    def defense(self):
+        return self.away if self.possession == "home" else self.home
+
+    def score_dict(self):
+        return {self.home.name: self.home_score, self.away.name: self.away_score}
+
+    def clone(self):
+        clone = GameState.__new__(GameState)
+        clone.__dict__.update(self.__dict__)
+        clone.home = self.home.clone()
+        clone.away = self.away.clone()
+        return clone
+
+    def snapshot(self):
+        return (
+            self.home.snapshot(),
+            self.away.snapshot(),
+            tuple([getattr(self, field) for field in SCALAR_FIELDS])
+        )
+
+    def restore(self, snapshot):
+        home, away, scalars = snapshot
+        self.home.restore(home)
+        self.away.restore(away)
+        for field, value in zip(SCALAR_FIELDS, scalars):
+            setattr(self, field, value)
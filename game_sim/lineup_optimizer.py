@@ -0,0 +1,224 @@
+import random
+from multiprocessing import Pool
+from batch import sim_seeded_game, split_seed_range
+from roster import find_team_data
+
+# Substitution thresholds the search may pick from
+THRESHOLDS = tuple(range(30, 85, 5))
+
+def _evaluate_games(args):
+    # (win, margin) for the team in each game of the seed range, ties counting half
+    team_data, opponent_data, team_home, start_seed, games = args
+    home_data, away_data = (team_data, opponent_data) if team_home else (opponent_data, team_data)
+    team, opponent = ("team1", "team2") if team_home else ("team2", "team1")
+    results = []
+    for seed in range(start_seed, start_seed + games):
+        _, _, box = sim_seeded_game(home_data, away_data, seed)
+        points, against = box[team]["score"], box[opponent]["score"]
+        results.append((1 if points > against else 0.5 if points == against else 0, points - against))
+    return results
+
+def depth_chart_config(team_data):
+    # (starters, sub_threshold) where starters is a sorted tuple of
+    # (side, index) into the team's offense/defense lists
+    starters = tuple(sorted(
+        (side, i) for side in ("offense", "defense")
+        for i, player in enumerate(team_data[side]) if player.get("in_game", False)
+    ))
+    return starters, team_data.get("sub_threshold", 50)
+
+def apply_depth_chart(team_data, config):
+    # Copy of team_data with the config's starters and threshold; player
+    # dicts other than the in_game flag are shared with the original
+    starters, threshold = config
+    starters = set(starters)
+    applied = dict(team_data)
+    for side in ("offense", "defense"):
+        applied[side] = [
+            dict(player, in_game=(side, i) in starters) for i, player in enumerate(team_data[side])
+        ]
+    applied["sub_threshold"] = threshold
+    return applied
+
+
+class DepthChartOptimizer:
+    """
+    Searches starting lineups and the substitution threshold for one team.
+
+    A configuration is scored by its win rate (ties count half) over the
+    seed range start_seed.. against each opponent, home and away. Every
+    configuration is played on the same seeds, so the comparison between two
+    lineups isn't swamped by game-to-game noise. Results are kept per
+    configuration and seed and extended in place when a configuration needs
+    more games, so nothing is simulated twice, and configurations are always
+    ranked on the same seeds: a rung playing n seeds scores everyone on
+    start_seed .. start_seed + n - 1, however many seeds some have played
+    in earlier generations.
+
+    optimize() is a local search. Each generation takes the incumbent plus a
+    sample of neighbouring configurations (one starter swapped for a backup at
+    the same position, or the threshold moved one step) and runs successive
+    halving over them: everyone plays min_games seeds, the better half plays
+    twice as many, and so on until one is left, who becomes the incumbent.
+    """
+
+    def __init__(self, roster_data, team, opponents=None, start_seed=0, workers=1):
+        self.team_data = find_team_data(roster_data, team)
+        if opponents is None:
+            opponents = [t["team_name"] for t in roster_data["teams"] if t["team_name"] != self.team_data["team_name"]]
+        self.opponents = [find_team_data(roster_data, opponent) for opponent in opponents]
+        self.start_seed = start_seed
+        self.workers = workers
+        # config -> ([wins], [margin]) per seed from start_seed, each a total
+        # over every opponent and venue
+        self.evaluated = {}
+        self.games_simulated = 0
+        self._pool = None
+
+    def seeds_played(self, config):
+        return len(self.evaluated[config][0]) if config in self.evaluated else 0
+
+    def score(self, config, seeds=None):
+        # (win rate, margin) over the first `seeds` seeds (default: all played)
+        wins, margin = self.evaluated[config]
+        seeds = len(wins) if seeds is None else seeds
+        games = seeds * 2 * len(self.opponents)
+        return sum(wins[:seeds]) / games, sum(margin[:seeds]) / games
+
+    def evaluation_cost(self, configs, seeds):
+        # Games still to simulate to bring every config up to `seeds` seeds
+        missing = sum(max(0, seeds - self.seeds_played(config)) for config in set(configs))
+        return missing * 2 * len(self.opponents)
+
+    def evaluate(self, configs, seeds):
+        # Brings every config up to `seeds` seeds, running all of them as one
+        # batch of pool tasks
+        tasks = []
+        owners = []
+        for config in dict.fromkeys(configs):
+            wins, margin = self.evaluated.setdefault(config, ([], []))
+            done = len(wins)
+            if done >= seeds:
+                continue
+            team_data = apply_depth_chart(self.team_data, config)
+            for opponent_data in self.opponents:
+                for team_home in (True, False):
+                    for seed, count in split_seed_range(self.start_seed + done, seeds - done, self.workers):
+                        tasks.append((team_data, opponent_data, team_home, seed, count))
+                        owners.append((config, seed - self.start_seed))
+            wins.extend([0] * (seeds - done))
+            margin.extend([0] * (seeds - done))
+            self.games_simulated += (seeds - done) * 2 * len(self.opponents)
+
+        if self._pool is not None and len(tasks) > 1:
+            results = self._pool.map(_evaluate_games, tasks)
+        else:
+            results = [_evaluate_games(task) for task in tasks]
+        for (config, offset), games in zip(owners, results):
+            wins, margin = self.evaluated[config]
+            for i, (win, points) in enumerate(games, offset):
+                wins[i] += win
+                margin[i] += points
+
+    def neighbours(self, config):
+        starters, threshold = config
+        starting = set(starters)
+        result = []
+        for side in ("offense", "defense"):
+            players = self.team_data[side]
+            for i, starter in enumerate(players):
+                if (side, i) not in starting:
+                    continue
+                for j, backup in enumerate(players):
+                    if (side, j) not in starting and backup["position"] == starter["position"]:
+                        swapped = tuple(sorted((starting - {(side, i)}) | {(side, j)}))
+                        result.append((swapped, threshold))
+        if threshold in THRESHOLDS:
+            step = THRESHOLDS.index(threshold)
+            for k in (step - 1, step + 1):
+                if 0 <= k < len(THRESHOLDS):
+                    result.append((starters, THRESHOLDS[k]))
+        else:
+            nearest = min(THRESHOLDS, key=lambda t: abs(t - threshold))
+            result.append((starters, nearest))
+        return result
+
+    def successive_halving(self, configs, min_games, budget):
+        # Returns the surviving config, stopping early (with the best of the
+        # current rung) if the next rung would go over budget
+        seeds = min_games
+        survivors = list(dict.fromkeys(configs))
+        ranked = survivors
+        while True:
+            cost = self.evaluation_cost(survivors, seeds)
+            if cost > budget - self.games_simulated:
+                break
+            self.evaluate(survivors, seeds)
+            # Everyone now has at least `seeds` seeds; rank on exactly those
+            ranked = sorted(survivors, key=lambda config, seeds=seeds: self.score(config, seeds), reverse=True)
+            if len(ranked) == 1:
+                break
+            survivors = ranked[:(len(ranked) + 1) // 2]
+            seeds *= 2
+        return ranked[0]
+
+    def optimize(self, budget_games=20000, population=8, min_games=20, patience=3, seed=0):
+        """
+        Runs the search until budget_games simulated games are used up or
+        `patience` generations in a row keep the incumbent. Returns the best
+        depth chart found.
+        """
+        rng = random.Random(seed)
+        incumbent = depth_chart_config(self.team_data)
+        tried = {incumbent}
+        stale = 0
+        pool = Pool(self.workers) if self.workers > 1 else None
+        self._pool = pool
+        try:
+            while stale < patience and self.games_simulated < budget_games:
+                untried = [config for config in self.neighbours(incumbent) if config not in tried]
+                if not untried:
+                    break
+                challengers = rng.sample(untried, min(population - 1, len(untried)))
+                tried.update(challengers)
+                winner = self.successive_halving([incumbent] + challengers, min_games, budget_games)
+                if winner == incumbent:
+                    stale += 1
+                else:
+                    incumbent = winner
+                    stale = 0
+        finally:
+            self._pool = None
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return self.describe(incumbent)
+
+    def describe(self, config):
+        starters, threshold = config
+        lineup = {}
+        for side, i in starters:
+            player = self.team_data[side][i]
+            lineup.setdefault(player["position"], []).append(player["name"])
+        seeds = self.seeds_played(config)
+        if seeds:
+            win_rate, margin = self.score(config)
+        else:
+            win_rate = margin = None
+        return {
+            "team_data": apply_depth_chart(self.team_data, config),
+            "starters": lineup,
+            "sub_threshold": threshold,
+            "win_rate": win_rate,
+            "margin": margin,
+            "seeds": seeds,
+            "games_simulated": self.games_simulated,
+            "configs_evaluated": len(self.evaluated),
+        }
+
+
+def optimize_depth_chart(roster_data, team, opponents=None, budget_games=20000, start_seed=0, workers=1, **options):
+    # One-shot wrapper; options are passed to DepthChartOptimizer.optimize()
+    optimizer = DepthChartOptimizer(roster_data, team, opponents, start_seed, workers)
+    return optimizer.optimize(budget_games, **options)
@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+from multiprocessing import Pool
+from batch import run_batch
+from result_cache import engine_fingerprint, roster_hash
+from shared_roster import SharedRoster, attach_roster
+
+def _matchup_cell(args):
+    # home_data/away_data can also be indices into the worker's shared roster
+    home_data, away_data, start_seed, games = args
+    batch = run_batch({"teams": [home_data, away_data]}, 0, 1, start_seed, games)
+    n = batch["games"]
+    return {
+        "home_win": batch["team1"]["wins"] / n,
+        "tie": batch["ties"] / n,
+        "away_win": batch["team2"]["wins"] / n,
+        "margin": (batch["team1"]["points"] - batch["team2"]["points"]) / n,
+    }
+
+
+class MatchupMatrix:
+    """
+    N x N table of head-to-head results (home win / tie / away win
+    probability and expected home margin) for every team in a roster file,
+    saved as JSON at path.
+
+    Each team's content hash is stored with the matrix. update() recomputes
+    only the rows and columns of teams whose hash changed (or that are new),
+    and everything if the engine fingerprint or game count changed.
+    """
+
+    def __init__(self, path, games=500, start_seed=0):
+        self.path = path
+        self.games = games
+        self.start_seed = start_seed
+        self.team_hashes = {}
+        self.cells = {}
+        if os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        if (data.get("engine") != engine_fingerprint() or data.get("games") != self.games
+                or data.get("start_seed") != self.start_seed):
+            return  # stale, rebuild from scratch
+        self.team_hashes = data["team_hashes"]
+        self.cells = {tuple(key.split("|", 1)): cell for key, cell in data["cells"].items()}
+
+    def save(self):
+        data = {
+            "engine": engine_fingerprint(),
+            "games": self.games,
+            "start_seed": self.start_seed,
+            "team_hashes": self.team_hashes,
+            "cells": {f"{home}|{away}": cell for (home, away), cell in self.cells.items()},
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def update(self, roster_data, workers=1):
+        """
+        Brings the matrix up to date with roster_data and saves it. Returns
+        the list of (home, away) cells that were recomputed.
+        """
+        teams = {team_data["team_name"]: team_data for team_data in roster_data["teams"]}
+        hashes = {name: roster_hash(team_data) for name, team_data in teams.items()}
+        changed = {name for name, h in hashes.items() if self.team_hashes.get(name) != h}
+
+        # Drop teams that left the league
+        self.cells = {
+            (home, away): cell for (home, away), cell in self.cells.items()
+            if home in teams and away in teams
+        }
+        stale = [
+            (home, away) for home in teams for away in teams
+            if home != away and (home in changed or away in changed or (home, away) not in self.cells)
+        ]
+
+        if workers > 1 and len(stale) > 1:
+            with SharedRoster(roster_data["teams"]) as shared, \
+                    Pool(workers, initializer=attach_roster, initargs=(shared.name,)) as pool:
+                tasks = [
+                    (shared.index(teams[home]), shared.index(teams[away]), self.start_seed, self.games)
+                    for home, away in stale
+                ]
+                results = pool.map(_matchup_cell, tasks)
+        else:
+            tasks = [(teams[home], teams[away], self.start_seed, self.games) for home, away in stale]
+            results = [_matchup_cell(task) for task in tasks]
+
+        for pair, cell in zip(stale, results):
+            self.cells[pair] = cell
+        self.team_hashes = hashes
+        self.save()
+        return stale
+
+    def win_probability(self, home, away):
+        return self.cells[(home, away)]["home_win"]
+
+    def expected_margin(self, home, away):
+        return self.cells[(home, away)]["margin"]
+
+    def probabilities(self):
+        # In the shape playoff_odds.playoff_odds() takes
+        return {
+            pair: (cell["home_win"], cell["tie"], cell["away_win"])
+            for pair, cell in self.cells.items()
+        }
@@ -1,9 +1,127 @@
-import random
+from itertools import accumulate
 from game_functions import apply_pass_fatigue, apply_run_fatigue
+from roster import NO_READS, positions_in, rating_reads
+from game_context import shared_context
+
+# Lineup aggregates. Each is computed from the on-field Lineup on first use
+# and cached there until a player at one of its positions subs out or one of
+# the ratings it reads drops a point to fatigue (see roster.Lineup). Weighted
+# picks keep cumulative weights, which rng.choices() would otherwise
+# rebuild on every call. Only ratings fatigue can change need listing as reads.
+# Aggregates that pick players by a test other than exact position (sackers,
+# tacklers) give the cache that same test.
+
+RUN_DEFENDER_POSITIONS = positions_in({'DL', 'OLB', 'MLB', 'ROLB'})
+RUN_DEFENDER_READS = rating_reads(RUN_DEFENDER_POSITIONS, ('tackling',))
+BALL_CARRIER_POSITIONS = positions_in({'RB', 'WR', 'QB'})
+BALL_CARRIER_READS = rating_reads(positions_in({'QB'}), ('speed',))
+RECEIVER_POSITIONS = positions_in({'WR', 'TE'})
+RECEIVER_READS = rating_reads(RECEIVER_POSITIONS, ('route_running', 'hands'))
+TARGET_POSITIONS = positions_in({'WR', 'TE', 'RB'})
+COVERAGE_POSITIONS = positions_in({'CB', 'S'})
+COVERAGE_READS = rating_reads(COVERAGE_POSITIONS, ('coverage', 'speed'))
+INTERCEPTOR_READS = rating_reads(COVERAGE_POSITIONS, ('coverage',))
+QB_POSITIONS = positions_in({'QB'})
+RB_POSITIONS = positions_in({'RB'})
+
+def _run_defenders(defense):
+    # (chance, yardage multiplier) for each front defender who can blow up a run
+    result = []
+    for player in defense:
+        if player.position not in ('DL', 'OLB', 'MLB', 'ROLB'):
+            continue
+        tackle_val = player.tackling
+        factor = tackle_val / 250 if tackle_val >= 50 else (100 - tackle_val) / 250
+        chance = (tackle_val / 100 if tackle_val >= 50 else (100 - tackle_val) / 100) * 0.5
+        result.append((chance, (1 - factor) if tackle_val >= 50 else (1 + factor)))
+    return result
+
+def _ball_carriers(offense):
+    # Mostly RB, sometimes WR/QB
+    candidates = [
+    p for p in offense 
+    if (p.position == 'RB') or 
+       (p.position == 'WR') or 
+       (p.position == 'QB' and p.speed > 60)
+    ]
+
+    weights = []
+    for p in candidates:
+        if p.position == 'RB':
+            weights.append(0.80)
+        elif p.position == 'WR':
+            weights.append(0.03)
+        elif p.position == 'QB':
+            weights.append(p.speed / 1000)  # e.g. speed 60 = 0.012
+        else:
+            weights.append(0.02)
+    return candidates, list(accumulate(weights))
+
+def _receivers(offense):
+    candidates = [p for p in offense if p.position in ('WR', 'TE')]
+    weights = [(p.route_running + p.hands + p.intelligence) / 3 for p in candidates]
+    return candidates, list(accumulate(weights))
+
+def _coverage(defense):
+    coverage_factor = sum(p.coverage / 1000 for p in defense if p.position in ('CB', 'S'))
+    defense_speed = [p.speed for p in defense if p.position in ('CB', 'S')]
+    avg_def_speed = sum(defense_speed) / len(defense_speed) if defense_speed else 50
+    return coverage_factor, avg_def_speed
+
+def _interceptors(defense):
+    # (defender, base interception chance) for the coverage players. LBs were
+    # meant to join on a guessed play, but were appended as a nested list and
+    # never matched; that behaviour is kept.
+    return [(p, 0.02 + p.coverage / 10000) for p in defense if p.position in ('CB', 'S')]
+
+def _targets(offense):
+    # Intended targets on an incompletion
+    receiving_candidates = [
+    p for p in offense if p.position in ('WR', 'TE', 'RB')
+    ]
+    weights = []
+    for p in receiving_candidates:
+        if p.position == 'RB':
+            weights.append(1)  # fixed low weight
+        else:
+            weights.append((p.route_running + p.hands + p.intelligence) / 3)
+
+    # Normalize RB weights to ~1% of total
+    total_non_rb = sum(w for p, w in zip(receiving_candidates, weights) if p.position != 'RB')
+    rb_count = sum(1 for p in receiving_candidates if p.position == 'RB')
+    if rb_count > 0:
+        rb_weight = (0.01 * total_non_rb) / rb_count
+        weights = [
+            rb_weight if p.position == 'RB' else w
+            for p, w in zip(receiving_candidates, weights)
+        ]
+    return receiving_candidates, list(accumulate(weights))
+
+def _sacks(position, guessed_play):
+    # DL always, LB only if the defense guessed the play
+    return position == 'DL' or (guessed_play and 'LB' in position)
+
+def _sackers(defense, guessed_play):
+    candidates = [p for p in defense if _sacks(p.position, guessed_play)]
+    return candidates, list(accumulate(p.rushing for p in candidates))
+
+SACKERS = {
+    False: lambda lineup: _sackers(lineup, False),
+    True: lambda lineup: _sackers(lineup, True),
+}
+SACK_POSITIONS = {guessed: (lambda position, guessed=guessed: _sacks(position, guessed)) for guessed in (False, True)}
+SACK_READS = {guessed: rating_reads(positions, ('rushing',)) for guessed, positions in SACK_POSITIONS.items()}
+
+def _qb(offense):
+    return next(p for p in offense if p.position == "QB")
+
+def _rbs(offense):
+    return [p for p in offense if p.position == 'RB']
 
 #{'pass_attempts': 0, 'completions': 0, 'pass_yards': 0, 'interceptions_thrown': 0, 'sacks_taken': 0, 'carries': 0, 
 # 'rush_yards': 0, 'fumbles': 0, 'receptions': 0, 'receiving_yards': 0, 'targets': 0, 'touchdowns': 0}
-def handle_qb_scramble(qb, verbose=False):
+def handle_qb_scramble(qb, verbose=False, ctx=shared_context):
+    rng = ctx.rng
     intelligence = qb.intelligence
     speed = qb.speed
     # Chance to scramble if no one is open
@@ -11,20 +129,20 @@ def handle_qb_scramble(qb, verbose=False):
     if speed < 60:
         scramble_chance *= 0.5
 
-    if random.random() > scramble_chance:
+    if rng.random() > scramble_chance:
         return None  # No scramble
 
     # Scramble happens
     gain_odds = 0.5 + ((speed - 50) / 100)  # 50% base + bonus for speed > 50
     gain_odds = min(0.95, max(0.1, gain_odds))  # Clamp between 10% and 95%
 
-    gain_yards = random.randint(1, 12)
-    lose_yards = random.randint(-6, -1)
+    gain_yards = rng.randint(1, 12)
+    lose_yards = rng.randint(-6, -1)
 
-    yards = gain_yards if random.random() < gain_odds else lose_yards
+    yards = gain_yards if rng.random() < gain_odds else lose_yards
     return yards
 
-def assign_forced_fumble(defense, base_yards, verbose=False):
+def assign_forced_fumble(defense, base_yards, verbose=False, ctx=shared_context):
     # Map yardage to positional group
     if base_yards <= 2:
         valid_positions = ['rolb', 'olb', 'mlb']  # front seven - assume close to line
@@ -42,7 +160,7 @@ def assign_forced_fumble(defense, base_yards, verbose=False):
     weights = [(p.tackling + p.strength) / 2 for p in candidates]
 
     # Choose one
-    forced_by = random.choices(candidates, weights=weights, k=1)[0]
+    forced_by = ctx.rng.weighted_choice(candidates, list(accumulate(weights)))
     forced_by.stats['forced_fumbles'] = forced_by.stats.get('forced_fumbles', 0) + 1
 
     if verbose:
@@ -50,48 +168,43 @@ def assign_forced_fumble(defense, base_yards, verbose=False):
 
     return forced_by
 
-import random
-
-def assign_tackles(defense, base_yards, verbose=False):
-    # Define tiered weights
-    short_weights = {
-        'dl': 0.35,
-        'rolb': 0.2,
-        'olb': 0.15,
-        'lb': 0.2,
-        's': 0.1
-    }
-    mid_weights = {
-        'rolb': 0.25,
-        'olb': 0.2,
-        'lb': 0.25,
-        's': 0.2,
-        'dl': 0.1
-    }
-    long_weights = {
-        's': 0.4,
-        'cb': 0.4,
-        'rolb': 0.08,
-        'olb': 0.06,
-        'lb': 0.06
-    }
-
-    # Determine blend weights
-    if base_yards <= 2:
-        weight_profile = short_weights
-    elif base_yards <= 7:
-        weight_profile = mid_weights
-    else:
-        weight_profile = long_weights
 
+# Tackle weights by position group for short, medium and long gains
+SHORT_TACKLE_WEIGHTS = {
+    'dl': 0.35,
+    'rolb': 0.2,
+    'olb': 0.15,
+    'lb': 0.2,
+    's': 0.1
+}
+MID_TACKLE_WEIGHTS = {
+    'rolb': 0.25,
+    'olb': 0.2,
+    'lb': 0.25,
+    's': 0.2,
+    'dl': 0.1
+}
+LONG_TACKLE_WEIGHTS = {
+    's': 0.4,
+    'cb': 0.4,
+    'rolb': 0.08,
+    'olb': 0.06,
+    'lb': 0.06
+}
+def _tackle_group(position, weight_profile):
+    # Weight table key for a position: its own name, else its first two
+    # letters ('lolb' -> 'lo', so LOLBs don't figure in any table)
+    pos = position.lower()
+    return pos if pos in weight_profile else pos[:2]
+
+def _tacklers(defense, weight_profile):
     # Build weighted candidate list
     candidates = []
     weights = []
     cb_count = 0
 
     for p in defense:
-        pos = p.position.lower()
-        pos_group = pos if pos in weight_profile else pos[:2]
+        pos_group = _tackle_group(p.position, weight_profile)
 
         if pos_group == 'cb':
             if cb_count >= 3:
@@ -103,32 +216,52 @@ def assign_tackles(defense, base_yards, verbose=False):
             position_weight = weight_profile[pos_group]
             candidates.append(p)
             weights.append(position_weight * skill_weight)
-
-    # Fallback if candidate pool is empty
+    return candidates, list(accumulate(weights))
+
+def _any_tacklers(defense):
+    # Fallback when nobody on the field is in the tier's weight table
+    return list(defense), list(accumulate((p.tackling + p.intelligence) / 2 for p in defense))
+
+TACKLE_WEIGHTS = {"short": SHORT_TACKLE_WEIGHTS, "mid": MID_TACKLE_WEIGHTS, "long": LONG_TACKLE_WEIGHTS}
+TACKLE_PROFILES = {tier: (lambda lineup, profile=profile: _tacklers(lineup, profile)) for tier, profile in TACKLE_WEIGHTS.items()}
+TACKLER_POSITIONS = {
+    tier: (lambda position, profile=profile: _tackle_group(position, profile) in profile)
+    for tier, profile in TACKLE_WEIGHTS.items()
+}
+TACKLER_READS = {tier: rating_reads(positions, ('tackling',)) for tier, positions in TACKLER_POSITIONS.items()}
+
+def assign_tackles(defense, base_yards, verbose=False, ctx=shared_context):
+    rng = ctx.rng
+    # Determine blend weights
+    if base_yards <= 2:
+        tier = "short"
+    elif base_yards <= 7:
+        tier = "mid"
+    else:
+        tier = "long"
+    candidates, cum_weights = defense.aggregate(
+        ("tacklers", tier), TACKLER_POSITIONS[tier], TACKLER_READS[tier], TACKLE_PROFILES[tier]
+    )
     if not candidates:
-        candidates = defense
-        weights = [(p.tackling + p.intelligence) / 2 for p in defense]
+        # Depends on every position on the field, so it isn't cached; no
+        # real lineup gets here
+        candidates, cum_weights = _any_tacklers(defense)
 
     # Solo vs assisted tackle
-    is_assisted = random.random() < 0.35
-
-    if is_assisted:
-        # Weighted sampling without replacement
-        if len(candidates) >= 2:
-            tacklers = random.choices(candidates, weights=weights, k=5)
-            seen = set()
-            unique = []
-            for t in tacklers:
-                if t not in seen:
-                    unique.append(t)
-                    seen.add(t)
-                if len(unique) == 2:
-                    break
-            tacklers = unique
-        else:
-            tacklers = random.choices(candidates, weights=weights, k=1)
+    is_assisted = rng.random() < 0.35
+
+    if is_assisted and len(candidates) >= 2:
+        # Weighted sampling without replacement: five draws, keeping the
+        # first and the first one after it that differs
+        first = rng.weighted_choice(candidates, cum_weights)
+        second = None
+        for _ in range(4):
+            pick = rng.weighted_choice(candidates, cum_weights)
+            if second is None and pick is not first:
+                second = pick
+        tacklers = [first] if second is None else [first, second]
     else:
-        tacklers = random.choices(candidates, weights=weights, k=1)
+        tacklers = [rng.weighted_choice(candidates, cum_weights)]
 
     if verbose:
         if is_assisted and len(tacklers) == 2:
@@ -139,22 +272,27 @@ def assign_tackles(defense, base_yards, verbose=False):
     return tacklers
 
 
-def assign_sack(defense, guessed_play=False):
+def assign_sack(defense, guessed_play=False, ctx=shared_context):
+    rng = ctx.rng
     # Sack candidates: DL always, LB only if not guessed correctly
-    candidates = [p for p in defense if p.position == 'DL' or (guessed_play and 'LB' in p.position)]
+    candidates, cum_weights = defense.aggregate(
+        ("sackers", guessed_play), SACK_POSITIONS[guessed_play], SACK_READS[guessed_play],
+        SACKERS[guessed_play]
+    )
     if not candidates:
         return [], False
 
     # 25% chance to split sack
-    is_half = random.random() < 0.25
+    is_half = rng.random() < 0.25
 
     # Pick 1 or 2 players based on is_half
-    selected = random.choices(candidates, weights=[p.rushing for p in candidates], k=2 if is_half else 1)
+    selected = rng.choices(candidates, cum_weights=cum_weights, k=2 if is_half else 1)
 
     return selected, is_half
 
-def get_run_yards(offense, defense, down, first_down, guessed_play, offense_line_advantage, yardline, verbose=False):
-    base_yards = 4.5
+def get_run_yards(offense, defense, down, first_down, guessed_play, offense_line_advantage, yardline, verbose=False, ctx=shared_context):
+    rng = ctx.rng
+    base_yards = ctx.constants.base_run_yards
 
     # Adjust for down
     if down == 2:
@@ -168,37 +306,13 @@ def get_run_yards(offense, defense, down, first_down, guessed_play, offense_line
     base_yards *= (1 + offense_line_advantage / 750)
 
     # Defensive impact (tackling DL/LBs, reduced chance)
-    for player in defense:
-        if player.position not in ('DL', 'OLB', 'MLB', 'ROLB'):
-            continue
-        tackle_val = player.tackling
-        factor = tackle_val / 250 if tackle_val >= 50 else (100 - tackle_val) / 250
-        chance = (tackle_val / 100 if tackle_val >= 50 else (100 - tackle_val) / 100) * 0.5
-        if random.random() < chance:
-            if tackle_val >= 50:
-                base_yards *= (1 - factor)
-            else:
-                base_yards *= (1 + factor)
+    for chance, multiplier in defense.aggregate("run_defenders", RUN_DEFENDER_POSITIONS, RUN_DEFENDER_READS, _run_defenders):
+        if rng.random() < chance:
+            base_yards *= multiplier
 
     # Choose ball carrier (mostly RB, sometimes WR/QB)
-    candidates = [
-    p for p in offense 
-    if (p.position == 'RB') or 
-       (p.position == 'WR') or 
-       (p.position == 'QB' and p.speed > 60)
-    ]
-
-    weights = []
-    for p in candidates:
-        if p.position == 'RB':
-            weights.append(0.80)
-        elif p.position == 'WR':
-            weights.append(0.03)
-        elif p.position == 'QB':
-            weights.append(p.speed / 1000)  # e.g. speed 60 = 0.012
-        else:
-            weights.append(0.02)
-    rushing_player = random.choices(candidates, weights=weights, k=1)[0]
+    candidates, cum_weights = offense.aggregate("ball_carriers", BALL_CARRIER_POSITIONS, BALL_CARRIER_READS, _ball_carriers)
+    rushing_player = rng.weighted_choice(candidates, cum_weights)
 
     for key in ['speed', 'strength', 'intelligence', 'elusiveness', 'vision']:
         if key in ('elusiveness', 'vision') and rushing_player.position != 'RB':
@@ -207,7 +321,7 @@ def get_run_yards(offense, defense, down, first_down, guessed_play, offense_line
         val = getattr(rushing_player, key)
         factor = val / 250 if val >= 50 else (100 - val) / 250
         chance = (val / 100 if val >= 50 else (100 - val) / 100) * 0.5
-        if random.random() < chance:
+        if rng.random() < chance:
             if val >= 50:
                 base_yards *= (1 + factor)
             else:
@@ -219,35 +333,35 @@ def get_run_yards(offense, defense, down, first_down, guessed_play, offense_line
     intel_factor = (100 - rushing_player.intelligence) / 100
     fumble_chance = fumble_base + (strength_factor * 0.005) + (intel_factor * 0.005)
 
-    if random.random() < fumble_chance:
+    if rng.random() < fumble_chance:
         if verbose:
             print("Fumble lost by", rushing_player.name)
         rushing_player.stats["carries"] += 1
         rushing_player.stats["rush_yards"] += round(base_yards)
         rushing_player.stats["fumbles"] += 1
         apply_run_fatigue(offense, defense, rushing_player, base_yards)
-        ff_player = assign_forced_fumble(defense, base_yards)
+        ff_player = assign_forced_fumble(defense, base_yards, ctx=ctx)
         ff_player.stats["forced_fumbles"] += 1
         ff_player.stats["tackles"] += 1
         return "fumble", 0  # turnover
 
     # Big Play Logic
     if rushing_player.speed > 75:
-        if random.random() < 0.10:
-            base_yards += random.randint(15, 40)
+        if rng.random() < 0.10:
+            base_yards += rng.randint(15, 40)
 
     # Guessed play penalty
-    if guessed_play and random.random() < 0.5:
-        base_yards += random.randint(-10, -1)
+    if guessed_play and rng.random() < 0.5:
+        base_yards += rng.randint(-10, -1)
 
     # Short yardage conversion
     if first_down <= 2 and base_yards > -1.25:
-        if random.random() < 0.6:
+        if rng.random() < 0.6:
             base_yards = first_down
 
     # Prevent overly suppressed plays
     if base_yards < 2.0:
-        base_yards = max(base_yards, random.uniform(1.5, 3.5))
+        base_yards = max(base_yards, rng.uniform(1.5, 3.5))
 
     if verbose:
         print("Rush for", round(base_yards), "yards by", rushing_player.name)
@@ -257,20 +371,22 @@ def get_run_yards(offense, defense, down, first_down, guessed_play, offense_line
     rushing_player.stats["carries"] += 1
     rushing_player.stats["rush_yards"] += round(base_yards)
     apply_run_fatigue(offense, defense, rushing_player, base_yards)
-    tacklers = assign_tackles(defense, base_yards)
+    tacklers = assign_tackles(defense, base_yards, ctx=ctx)
     for player in tacklers :
         player.stats['tackles'] += 1
     return "run", round(base_yards)
 
-def get_pass_yards(offense, defense, down, first_down, guessed_play, offense_line_advantage, yardline, verbose=False):
-    qb = next(p for p in offense if p.position == "QB")
+def get_pass_yards(offense, defense, down, first_down, guessed_play, offense_line_advantage, yardline, verbose=False, ctx=shared_context):
+    rng = ctx.rng
+    constants = ctx.constants
+    qb = offense.aggregate("qb", QB_POSITIONS, NO_READS, _qb)
     # --- Sack logic ---
-    sack_rate = 0.005 + (0.005 * down)
+    sack_rate = constants.sack_rate_base + (constants.sack_rate_per_down * down)
     if guessed_play: sack_rate += 0.1
     sack_rate -= offense_line_advantage / 5000
-    if random.random() < sack_rate:
-        sack_yards = int(-abs(random.gauss(8, 2)))  # More realistic sack losses
-        sackers, is_half = assign_sack(defense, guessed_play=guessed_play) 
+    if rng.random() < sack_rate:
+        sack_yards = int(-abs(rng.gauss(8, 2)))  # More realistic sack losses
+        sackers, is_half = assign_sack(defense, guessed_play=guessed_play, ctx=ctx)
         for sacker in (sackers):
             if is_half :
                 sacker.stats['sacks'] += 0.5
@@ -282,7 +398,7 @@ def get_pass_yards(offense, defense, down, first_down, guessed_play, offense_lin
         intel_factor = (100 - qb.intelligence) / 100
         fumble_chance = 0.02 + (strength_factor * 0.01) + (intel_factor * 0.005)
 
-        if random.random() < fumble_chance:
+        if rng.random() < fumble_chance:
             qb.stats["fumbles"] += 1
             for sacker in (sackers):
                 if is_half :
@@ -296,21 +412,16 @@ def get_pass_yards(offense, defense, down, first_down, guessed_play, offense_lin
         return "sack", sack_yards
 
     # --- Begin Pass Logic --
-    coverage_players = ['CB', 'S']
-    if guessed_play :
-        coverage_players.append(['LOLB', 'MLB', 'ROLB'])
-    coverage_factor = sum(p.coverage / 1000 for p in defense if p.position in ('CB', 'S'))
-    defense_speed = [p.speed for p in defense if p.position in ('CB', 'S')]
-    avg_def_speed = sum(defense_speed) / len(defense_speed) if defense_speed else 50
+    coverage_factor, avg_def_speed = defense.aggregate("coverage", COVERAGE_POSITIONS, COVERAGE_READS, _coverage)
     # Completion chance baseline
-    completion_chance = 0.35 + (
+    completion_chance = constants.completion_baseline + (
         qb.intelligence + qb.passing + qb.decision_making
     ) / 1000
     # Select potential receivers
-    receiving_candidates = [p for p in offense if p.position in ('WR', 'TE')]
-    receiving_candidates = random.choices(
+    receiving_candidates, cum_weights = offense.aggregate("receivers", RECEIVER_POSITIONS, RECEIVER_READS, _receivers)
+    receiving_candidates = rng.choices(
         receiving_candidates,
-        weights=[(p.route_running + p.hands + p.intelligence) / 3 for p in receiving_candidates],
+        cum_weights=cum_weights,
         k=len(receiving_candidates)
     )
 
@@ -327,18 +438,18 @@ def get_pass_yards(offense, defense, down, first_down, guessed_play, offense_lin
         completion_chance = completion_chance + route_running_factor + speed_factor - (coverage_factor/1.9)
         if completion_chance < 0 :
             completion_chance = 0.01
-        if random.random() < completion_chance:
+        if rng.random() < completion_chance:
             receiving_player = player
             break
         completion_chance -= 0.05  # Decrease for next option
 
     # Successful pass
     if receiving_player:
-        base_yards = random.gauss(9.5, 4)
+        base_yards = rng.gauss(9.5, 4)
         speed_factor = receiving_player.speed / avg_def_speed
         base_yards *= speed_factor
-        if speed_factor > 1 and random.random() < 0.1:
-            base_yards = random.randint(20, 70)
+        if speed_factor > 1 and rng.random() < 0.1:
+            base_yards = rng.randint(20, 70)
         yards = min(round(base_yards), 40)
 
         if verbose: print("Pass for", yards, "yards to", receiving_player.name)
@@ -347,7 +458,7 @@ def get_pass_yards(offense, defense, down, first_down, guessed_play, offense_lin
                 qb.stats["touchdowns"] += 1
                 receiving_player.stats["touchdowns"] += 1
         else :
-            tacklers = assign_tackles(defense, yards)
+            tacklers = assign_tackles(defense, yards, ctx=ctx)
             for player in tacklers :
                 player.stats['tackles'] += 1
         qb.stats["pass_attempts"] += 1
@@ -360,20 +471,20 @@ def get_pass_yards(offense, defense, down, first_down, guessed_play, offense_lin
         return "successful_pass", yards
 
     # --- Checkdown fallback ---
-    if random.random() < 0.18:
-        rbs = [p for p in offense if p.position == 'RB']
+    if rng.random() < 0.18:
+        rbs = offense.aggregate("rbs", RB_POSITIONS, NO_READS, _rbs)
         if rbs:
-            rb = random.choice(rbs)
-            yards = random.gauss(3, 2)
-            if random.random() < rb.speed / 100:
-                yards += random.randint(1, 9)
+            rb = rng.choice(rbs)
+            yards = rng.gauss(3, 2)
+            if rng.random() < rb.speed / 100:
+                yards += rng.randint(1, 9)
             yards = round(max(0, yards))
             if yards + yardline > 100 :
                 yards = 100 - yardline
                 qb.stats["touchdowns"] += 1
                 rb.stats["touchdowns"] += 1
             else :
-                tacklers = assign_tackles(defense, yards)
+                tacklers = assign_tackles(defense, yards, ctx=ctx)
                 for player in tacklers :
                     player.stats['tackles'] += 1
             if verbose: print("Checkdown for", yards, "yards to", rb.name)
@@ -387,16 +498,13 @@ def get_pass_yards(offense, defense, down, first_down, guessed_play, offense_lin
             return "checkdown_pass", yards
     highest_chance = 0
     best_defender = None
-    for p in defense:
-        if p.position not in coverage_players:
-            continue
-        chance = 0.02 + p.coverage / 10000
+    for p, chance in defense.aggregate("interceptors", COVERAGE_POSITIONS, INTERCEPTOR_READS, _interceptors):
         if guessed_play: chance += 0.005
         chance += (100 - qb.decision_making) / 2000
         if chance > highest_chance:
             highest_chance = chance
             best_defender = p
-    if best_defender and random.random() < min(highest_chance, 0.03):
+    if best_defender and rng.random() < min(highest_chance, 0.03):
         if verbose: print("Intercepted by", best_defender.name)
         #add logic for interception returns later
         qb.stats["pass_attempts"] += 1
@@ -406,41 +514,23 @@ def get_pass_yards(offense, defense, down, first_down, guessed_play, offense_lin
         return "interception", yardline + 10
     
  # --- QB scramble ---
-    scramble_result = handle_qb_scramble(qb, verbose=False)
+    scramble_result = handle_qb_scramble(qb, verbose=False, ctx=ctx)
     if scramble_result is not None:
         if scramble_result + yardline > 100 :
                 scramble_result = 100 - yardline
                 qb.stats['touchdowns'] += round(scramble_result)
         else :
-            tacklers = assign_tackles(defense, scramble_result)
+            tacklers = assign_tackles(defense, scramble_result, ctx=ctx)
             for player in tacklers :
                 player.stats['tackles'] += 1
         qb.stats['carries'] += 1
         qb.stats['rush_yards'] += round(scramble_result)
         apply_run_fatigue(offense, defense, qb, scramble_result)
         return "run", scramble_result
-    receiving_candidates = [
-    p for p in offense if p.position in ('WR', 'TE', 'RB')
-    ]
-    weights = []
-    for p in receiving_candidates:
-        if p.position == 'RB':
-            weights.append(1)  # fixed low weight
-        else:
-            weights.append((p.route_running + p.hands + p.intelligence) / 3)
-
-    # Normalize RB weights to ~1% of total
-    total_non_rb = sum(w for p, w in zip(receiving_candidates, weights) if p.position != 'RB')
-    rb_count = sum(1 for p in receiving_candidates if p.position == 'RB')
-    if rb_count > 0:
-        rb_weight = (0.01 * total_non_rb) / rb_count
-        weights = [
-            rb_weight if p.position == 'RB' else w
-            for p, w in zip(receiving_candidates, weights)
-        ]
+    receiving_candidates, cum_weights = offense.aggregate("targets", TARGET_POSITIONS, RECEIVER_READS, _targets)
 
     # Select one target
-    intended_target = random.choices(receiving_candidates, weights=weights, k=1)[0]
+    intended_target = rng.weighted_choice(receiving_candidates, cum_weights)
     qb.stats['pass_attempts'] += 1
     intended_target.stats['targets'] +=1
     apply_pass_fatigue(offense, defense)
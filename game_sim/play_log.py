@@ -0,0 +1,110 @@
+# Play-by-play recording. Pass a PlayLog to play_game() and sim_drive()
+# appends one dict per snap (and per field goal or punt) to its plays:
+# {
+#   "half": 1, "clock": 1835,            # seconds left in the half at the snap
+#   "offense": ..., "defense": ...,      # team names
+#   "down": 3, "distance": 8, "yardline": 42,
+#   "play_type": "pass",                 # run, pass, penalty, field_goal or punt
+#   "result": "interception",            # sim_play()/sim_drive() result string
+#   "yards": 0, "touchdown": False,
+#   "players": [(team, player, position, role), ...]
+# }
+# and one dict per drive to its drives, once the drive's scoring is settled:
+# {"half": 1, "clock": 1790, "offense": ..., "result": "touchdown", "score": {team: points}}
+#
+# The play functions don't report who was involved, so players and their
+# roles are read off the stat counters that moved during the play: a target
+# is whoever's "targets" went up, a forced fumble whoever's "forced_fumbles"
+# did, and so on. Only the lineups on the field for the play are checked.
+
+# role -> player stats that mark it
+ROLE_STATS = {
+    "passer": ("pass_attempts", "sacks_taken"),
+    "rusher": ("carries",),
+    "target": ("targets",),
+    "receiver": ("receptions",),
+    "fumbler": ("fumbles",),
+    "tackler": ("tackles",),
+    "sacker": ("sacks",),
+    "interceptor": ("interceptions",),
+    "forced_fumble": ("forced_fumbles",),
+}
+
+KICK_ROLES = {"field_goal": "kicker", "punt": "punter"}
+
+def distance_bucket(distance):
+    if distance <= 3:
+        return "short"
+    if distance <= 7:
+        return "medium"
+    return "long"
+
+def field_zone(yardline):
+    # yardline counts from the offense's own goal line
+    if yardline <= 20:
+        return "backed_up"
+    if yardline <= 50:
+        return "own"
+    if yardline < 80:
+        return "opponent"
+    return "red_zone"
+
+class PlayLog:
+    def __init__(self):
+        self.plays = []
+        self.drives = []
+        self.half = 1
+        self._stats = {}  # id(player) -> copy of player.stats after the last play
+
+    def start_game(self, home_team, away_team):
+        for team in (home_team, away_team):
+            for player in team.get_all_offense() + team.get_all_defense():
+                self._stats[id(player)] = player.stats.copy()
+
+    def _involved(self, team, lineup):
+        # Most players' stats don't move on a given play, and comparing or
+        # copying the whole dict is far cheaper than reading stats one by one
+        involved = []
+        seen = self._stats
+        for player in lineup:
+            stats = player.stats
+            before = seen.get(id(player))
+            if stats == before:
+                continue
+            seen[id(player)] = stats.copy()
+            if before is None:
+                before = {}
+            for role, role_stats in ROLE_STATS.items():
+                for stat in role_stats:
+                    if stats.get(stat, 0) != before.get(stat, 0):
+                        involved.append((team.name, player.name, player.position, role))
+                        break
+        return involved
+
+    def record_play(self, offense_team, defense_team, down, distance, yardline, clock,
+                    play_type, result, yards, touchdown=False):
+        players = self._involved(offense_team, offense_team.get_offense())
+        players += self._involved(defense_team, defense_team.get_defense())
+        self.plays.append({
+            "half": self.half, "clock": clock,
+            "offense": offense_team.name, "defense": defense_team.name,
+            "down": down, "distance": distance, "yardline": yardline,
+            "play_type": play_type, "result": result, "yards": yards, "touchdown": touchdown,
+            "players": players,
+        })
+
+    def record_kick(self, offense_team, defense_team, kicker, down, distance, yardline, clock,
+                    play_type, result, yards):
+        self.plays.append({
+            "half": self.half, "clock": clock,
+            "offense": offense_team.name, "defense": defense_team.name,
+            "down": down, "distance": distance, "yardline": yardline,
+            "play_type": play_type, "result": result, "yards": yards, "touchdown": False,
+            "players": [(offense_team.name, kicker.name, kicker.position, KICK_ROLES[play_type])],
+        })
+
+    def record_drive(self, offense_team, result, score, clock):
+        self.drives.append({
+            "half": self.half, "clock": clock, "offense": offense_team.name, "result": result,
+            "score": dict(score),
+        })
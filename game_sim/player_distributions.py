@@ -0,0 +1,162 @@
+import math
+
+# Bins are 1 unit wide except for stats that can be split in half
+STAT_BIN_WIDTHS = {
+    "sacks": 0.5,
+    "forced_fumbles": 0.5,
+}
+# Values outside this range land in the first/last bin, which keeps the
+# number of bins per stat bounded no matter how many games are fed in
+STAT_RANGE = (-100, 1000)
+
+
+class StatHistogram:
+    """
+    Fixed-width histogram of one stat across games. Bins are stored sparsely
+    (bin index -> count) and two histograms with the same width merge by
+    adding counts, so workers can each keep their own and combine at the end.
+    """
+
+    def __init__(self, width=1):
+        self.width = width
+        self.bins = {}
+        self.count = 0
+        self.total = 0
+        self.low = None
+        self.high = None
+
+    def add(self, value):
+        lo, hi = STAT_RANGE
+        clamped = min(max(value, lo), hi)
+        index = math.floor(clamped / self.width)
+        self.bins[index] = self.bins.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.low is None or value < self.low:
+            self.low = value
+        if self.high is None or value > self.high:
+            self.high = value
+
+    def merge(self, other):
+        if other.width != self.width:
+            raise ValueError("Cannot merge histograms with different bin widths")
+        for index, n in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.low is not None and (self.low is None or other.low < self.low):
+            self.low = other.low
+        if other.high is not None and (self.high is None or other.high > self.high):
+            self.high = other.high
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, q):
+        # Lower edge of the bin holding the q-th percentile (0-100)
+        if not self.count:
+            return None
+        target = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen >= target:
+                return index * self.width
+        return self.high
+
+    def prob_over(self, line):
+        # Share of games strictly above line. Exact when line falls between
+        # bin edges (e.g. 74.5 yards with 1-yard bins).
+        if not self.count:
+            return 0
+        over = sum(n for index, n in self.bins.items() if index * self.width > line)
+        return over / self.count
+
+    def to_dict(self):
+        return {
+            "width": self.width,
+            "bins": {str(index): n for index, n in self.bins.items()},
+            "count": self.count,
+            "total": self.total,
+            "low": self.low,
+            "high": self.high,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data["width"])
+        hist.bins = {int(index): n for index, n in data["bins"].items()}
+        hist.count = data["count"]
+        hist.total = data["total"]
+        hist.low = data["low"]
+        hist.high = data["high"]
+        return hist
+
+
+class PlayerStatDistributions:
+    """
+    Per-player, per-stat histograms keyed by (team name, player name). Memory
+    depends on the roster and the bin ranges, not on how many games are added.
+    """
+
+    def __init__(self):
+        self.players = {}
+
+    def add_game(self, *teams):
+        # Call once per finished game with the teams that played it
+        for team in teams:
+            for player in team.offense + team.defense:
+                key = (team.name, player.name)
+                hists = self.players.get(key)
+                if hists is None:
+                    hists = self.players[key] = {}
+                for stat, value in player.stats.items():
+                    hist = hists.get(stat)
+                    if hist is None:
+                        hist = hists[stat] = StatHistogram(STAT_BIN_WIDTHS.get(stat, 1))
+                    hist.add(value)
+
+    def merge(self, other):
+        for key, other_hists in other.players.items():
+            hists = self.players.setdefault(key, {})
+            for stat, other_hist in other_hists.items():
+                if stat in hists:
+                    hists[stat].merge(other_hist)
+                else:
+                    hist = hists[stat] = StatHistogram(other_hist.width)
+                    hist.merge(other_hist)
+        return self
+
+    def histogram(self, team, player, stat):
+        return self.players[(team, player)][stat]
+
+    def percentile(self, team, player, stat, q):
+        return self.histogram(team, player, stat).percentile(q)
+
+    def prob_over(self, team, player, stat, line):
+        return self.histogram(team, player, stat).prob_over(line)
+
+    def prob_under(self, team, player, stat, line):
+        hist = self.histogram(team, player, stat)
+        under = sum(n for index, n in hist.bins.items() if index * hist.width < line)
+        return under / hist.count if hist.count else 0
+
+    def to_dict(self):
+        # JSON-friendly form, used when distributions ride along in batch results
+        return {
+            team: {
+                player: {stat: hist.to_dict() for stat, hist in hists.items()}
+                for (t, player), hists in self.players.items() if t == team
+            }
+            for team in {t for t, _ in self.players}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        dists = cls()
+        for team, players in data.items():
+            for player, hists in players.items():
+                dists.players[(team, player)] = {
+                    stat: StatHistogram.from_dict(hist) for stat, hist in hists.items()
+                }
+        return dists
@@ -0,0 +1,116 @@
+import random
+from operator import add, truediv
+from batch import run_batch
+from result_cache import cached_batch
+
+def matchup_probabilities(roster_data, pairs, games=500, start_seed=0, workers=1, cache=None):
+    """
+    Runs the full engine for each (home, away) pair and returns
+    {(home, away): (home_win, tie, away_win)}. With a ResultCache the batches
+    are stored on disk, so later calls with the same rosters are lookups.
+    """
+    probs = {}
+    for home, away in pairs:
+        if (home, away) in probs:
+            continue
+        if cache is not None:
+            batch = cached_batch(cache, roster_data, home, away, start_seed, games, workers)
+        else:
+            batch = run_batch(roster_data, home, away, start_seed, games, workers)
+        n = batch["games"]
+        probs[(home, away)] = (batch["team1"]["wins"] / n, batch["ties"] / n, batch["team2"]["wins"] / n)
+    return probs
+
+def all_pairs(teams):
+    return [(home, away) for home in teams for away in teams if home != away]
+
+def _playoff_game(rng, probs, higher, lower):
+    # Higher seed hosts; a regulation tie goes to overtime as a coin flip
+    home_win, tie, _ = probs[(higher, lower)]
+    return higher if rng.random() < home_win + tie / 2 else lower
+
+def _play_bracket(rng, probs, seeds):
+    # Single elimination, reseeded every round. When the field isn't a power
+    # of two the top seeds get first-round byes.
+    bracket = list(seeds)
+    rank = {team: i for i, team in enumerate(seeds)}
+    while len(bracket) > 1:
+        size = 1 << (len(bracket) - 1).bit_length()
+        byes = size - len(bracket)
+        advancing = bracket[:byes]
+        playing = bracket[byes:]
+        for i in range(len(playing) // 2):
+            advancing.append(_playoff_game(rng, probs, playing[i], playing[-1 - i]))
+        bracket = sorted(advancing, key=rank.__getitem__)
+    return bracket[0]
+
+def playoff_odds(standings, remaining, probs, playoff_teams=4, seasons=100000, seed=0):
+    """
+    Monte Carlo playoff and title odds.
+
+    standings: {team: {"wins", "losses", "ties", "points_for", "points_against"}}
+    remaining: list of (home, away) games still to play
+    probs:     matchup_probabilities() for every remaining game and every
+               possible playoff pairing (all_pairs(teams) covers both)
+
+    The regular season is sampled game by game across all seasons at once,
+    so each game costs a few list operations over `seasons` entries rather
+    than a Python loop per season. Seeding is by win percentage (ties count
+    half a win), so teams with a game in hand aren't ranked on raw wins,
+    then point differential to date, then a random draw.
+    """
+    if seasons < 1:
+        raise ValueError(f"seasons must be at least 1, got {seasons}")
+    if not 1 <= playoff_teams <= len(standings):
+        raise ValueError(f"playoff_teams must be between 1 and {len(standings)} teams, got {playoff_teams}")
+    rng = random.Random(seed)
+    teams = list(standings)
+    index = {team: i for i, team in enumerate(teams)}
+
+    played = {team: standings[team]["wins"] + standings[team]["losses"] + standings[team].get("ties", 0) for team in teams}
+    for home, away in remaining:
+        played[home] += 1
+        played[away] += 1
+
+    # Standings points: 2 per win, 1 per tie
+    totals = [[2 * standings[team]["wins"] + standings[team].get("ties", 0)] * seasons for team in teams]
+    for home, away in remaining:
+        home_win, tie, _ = probs[(home, away)]
+        home_or_tie = home_win + tie
+        home_points = [2 if u < home_win else (1 if u < home_or_tie else 0) for u in [rng.random() for _ in range(seasons)]]
+        away_points = [2 - p for p in home_points]
+        totals[index[home]] = list(map(add, totals[index[home]], home_points))
+        totals[index[away]] = list(map(add, totals[index[away]], away_points))
+
+    differential = [
+        standings[team].get("points_for", 0) - standings[team].get("points_against", 0) for team in teams
+    ]
+    made_playoffs = [0] * len(teams)
+    titles = [0] * len(teams)
+    seed_counts = [[0] * playoff_teams for _ in teams]
+    expected_points = [sum(t) / seasons for t in totals]
+    # Standings points available to each team; points / available is its win
+    # percentage, divided rather than scaled so equal records compare equal
+    available = [2 * played[team] or 1 for team in teams]
+
+    order = range(len(teams))
+    for season_totals in zip(*totals):
+        draws = [rng.random() for _ in order]
+        win_pct = list(map(truediv, season_totals, available))
+        ranked = sorted(order, key=lambda i: (win_pct[i], differential[i], draws[i]), reverse=True)
+        seeds = ranked[:playoff_teams]
+        for position, i in enumerate(seeds):
+            made_playoffs[i] += 1
+            seed_counts[i][position] += 1
+        champion = _play_bracket(rng, probs, [teams[i] for i in seeds])
+        titles[index[champion]] += 1
+
+    return {
+        team: {
+            "playoffs": made_playoffs[i] / seasons,
+            "title": titles[i] / seasons,
+            "seeds": [n / seasons for n in seed_counts[i]],
+            "expected_win_pct": expected_points[i] / (2 * played[team]) if played[team] else 0,
+        }
+        for i, team in enumerate(teams)
+    }
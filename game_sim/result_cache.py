@@ -0,0 +1,165 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+# Files whose contents decide simulation outcomes. Any edit to them changes
+# the engine fingerprint, so results cached by an older engine are never reused.
+ENGINE_MODULES = [
+    "roster.py",
+    "shared_roster.py",
+    "engine_random.py",
+    "engine_constants.py",
+    "engine_constants.json",
+    "game_context.py",
+    "play_functions.py",
+    "drive_functions.py",
+    "game_functions.py",
+    "start_game.py",
+    "batch.py",
+    "player_distributions.py",
+]
+
+_engine_fingerprint = None
+
+def engine_fingerprint():
+    global _engine_fingerprint
+    if _engine_fingerprint is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for name in ENGINE_MODULES:
+            path = os.path.join(here, name)
+            if os.path.exists(path):
+                digest.update(name.encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        _engine_fingerprint = digest.hexdigest()[:16]
+    return _engine_fingerprint
+
+def roster_hash(*team_data):
+    # Canonical JSON so key order and whitespace in rosters.json don't matter
+    digest = hashlib.sha256()
+    for data in team_data:
+        digest.update(json.dumps(data, sort_keys=True, separators=(",", ":")).encode())
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    On-disk cache of simulation results.
+
+    Entries live in one directory as <family>-<games>.json, where the family is
+    a hash of (kind, roster hash, engine fingerprint, start seed). Keeping the
+    game count out of the hash lets a bigger request reuse the longest cached
+    prefix of the same seed range and only simulate the rest. File mtimes are
+    bumped on every hit and the least recently used files are dropped once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def family(self, kind, roster_key, start_seed):
+        raw = f"{kind}|{roster_key}|{engine_fingerprint()}|{start_seed}"
+        return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+    def _path(self, family, games):
+        return os.path.join(self.directory, f"{family}-{games}.json")
+
+    def _read(self, path):
+        try:
+            with open(path, "r") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return payload
+
+    def get(self, kind, roster_key, start_seed, games):
+        return self._read(self._path(self.family(kind, roster_key, start_seed), games))
+
+    def longest_prefix(self, kind, roster_key, start_seed, games):
+        # Largest cached entry covering start_seed .. start_seed + n with n <= games
+        family = self.family(kind, roster_key, start_seed)
+        best = 0
+        for path in glob.glob(os.path.join(self.directory, f"{family}-*.json")):
+            try:
+                cached_games = int(path[:-len(".json")].rsplit("-", 1)[1])
+            except ValueError:
+                continue
+            if best < cached_games <= games:
+                best = cached_games
+        if not best:
+            return 0, None
+        payload = self._read(self._path(family, best))
+        return (best, payload) if payload is not None else (0, None)
+
+    def put(self, kind, roster_key, start_seed, games, payload):
+        path = self._path(self.family(kind, roster_key, start_seed), games)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def cached_run(self, kind, roster_key, start_seed, games, run, merge):
+        """
+        Returns the result for games seeds starting at start_seed.
+        run(start_seed, games) simulates a range from scratch and
+        merge(first, second) joins two adjacent ranges.
+        """
+        payload = self.get(kind, roster_key, start_seed, games)
+        if payload is not None:
+            return payload
+
+        cached_games, prefix = self.longest_prefix(kind, roster_key, start_seed, games)
+        rest = run(start_seed + cached_games, games - cached_games)
+        payload = merge(prefix, rest) if prefix is not None else rest
+        self.put(kind, roster_key, start_seed, games, payload)
+        return payload
+
+
+def cached_batch(cache, roster_data, home, away, start_seed=0, games=1000, workers=1, box_scores=False,
+                 player_distributions=False):
+    from batch import run_batch, merge_batches
+    from roster import find_team_data
+
+    home_data = find_team_data(roster_data, home)
+    away_data = find_team_data(roster_data, away)
+    kind = "batch"
+    if box_scores:
+        kind += "+box_scores"
+    if player_distributions:
+        kind += "+player_distributions"
+
+    def run(seed, count):
+        return run_batch(roster_data, home, away, seed, count, workers, box_scores, player_distributions)
+
+    return cache.cached_run(kind, roster_hash(home_data, away_data), start_seed, games, run, merge_batches)
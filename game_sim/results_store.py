@@ -0,0 +1,357 @@
+import sqlite3
+from batch import iter_game_records
+from play_log import KICK_ROLES, ROLE_STATS, distance_bucket, field_zone
+from roster import find_team_data
+
+# Player stat columns, in the order they are stored
+PLAYER_STATS = [
+    "pass_attempts", "completions", "pass_yards", "interceptions_thrown", "sacks_taken",
+    "carries", "rush_yards", "fumbles", "receptions", "receiving_yards", "targets",
+    "touchdowns", "tackles", "sacks", "interceptions", "forced_fumbles",
+    "fg_attempted", "fg_made", "pat_attempts", "pat_made", "punts", "punt_yards",
+]
+
+# summarize_stats() names -> team stat columns
+TEAM_STATS = [
+    ("Pass Attempts", "pass_attempts"), ("Completions", "completions"), ("Pass Yards", "pass_yards"),
+    ("Interceptions Thrown", "interceptions_thrown"), ("Sacks Taken", "sacks_taken"),
+    ("Carries", "carries"), ("Rush Yards", "rush_yards"), ("Fumbles", "fumbles"),
+    ("Receptions", "receptions"), ("Receiving Yards", "receiving_yards"), ("Targets", "targets"),
+    ("Touchdowns", "touchdowns"), ("Tackles", "tackles"), ("Sacks", "sacks"),
+    ("Interceptions", "interceptions"), ("PATs Made", "pat_made"), ("PATS Attempted", "pat_attempts"),
+    ("Field Goals Made", "fg_made"), ("Field Goals Attempted", "fg_attempted"),
+    ("Punts", "punts"), ("Punt Yards", "punt_yards"),
+]
+
+def _columns(names, kind):
+    return ", ".join(f"{name} {kind} NOT NULL DEFAULT 0" for name in names)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    season INTEGER NOT NULL, week INTEGER, seed INTEGER,
+    home TEXT NOT NULL, away TEXT NOT NULL,
+    home_score INTEGER NOT NULL, away_score INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS team_games (
+    game_id INTEGER NOT NULL, season INTEGER NOT NULL,
+    team TEXT NOT NULL, opponent TEXT NOT NULL, is_home INTEGER NOT NULL,
+    points INTEGER NOT NULL, points_allowed INTEGER NOT NULL,
+    {_columns([column for _, column in TEAM_STATS], "REAL")}
+);
+CREATE TABLE IF NOT EXISTS player_games (
+    game_id INTEGER NOT NULL, season INTEGER NOT NULL,
+    team TEXT NOT NULL, opponent TEXT NOT NULL, is_home INTEGER NOT NULL,
+    player TEXT NOT NULL, position TEXT NOT NULL,
+    {_columns(PLAYER_STATS, "REAL")}
+);
+CREATE TABLE IF NOT EXISTS player_seasons (
+    season INTEGER NOT NULL, team TEXT NOT NULL, player TEXT NOT NULL, position TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    {_columns(PLAYER_STATS, "REAL")},
+    PRIMARY KEY (season, team, player)
+);
+
+CREATE TABLE IF NOT EXISTS plays (
+    id INTEGER PRIMARY KEY,
+    game_id INTEGER NOT NULL, season INTEGER NOT NULL, half INTEGER NOT NULL, clock INTEGER NOT NULL,
+    offense TEXT NOT NULL, defense TEXT NOT NULL,
+    down INTEGER NOT NULL, distance INTEGER NOT NULL, yardline INTEGER NOT NULL,
+    distance_bucket TEXT NOT NULL, zone TEXT NOT NULL,
+    play_type TEXT NOT NULL, result TEXT NOT NULL, yards INTEGER NOT NULL, touchdown INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS play_players (
+    play_id INTEGER NOT NULL, team TEXT NOT NULL, player TEXT NOT NULL, position TEXT NOT NULL,
+    role TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS games_season ON games (season);
+CREATE INDEX IF NOT EXISTS games_matchup ON games (home, away);
+CREATE INDEX IF NOT EXISTS team_games_team ON team_games (team, season);
+CREATE INDEX IF NOT EXISTS team_games_season ON team_games (season);
+CREATE INDEX IF NOT EXISTS player_games_player ON player_games (player, season);
+CREATE INDEX IF NOT EXISTS player_games_team ON player_games (team, season);
+
+-- Play-by-play secondary indexes, maintained as plays are inserted: by
+-- player (and role), by turnover/sack result, touchdowns, and by
+-- down/distance/field-zone situation
+CREATE INDEX IF NOT EXISTS play_players_player ON play_players (player, role, play_id);
+CREATE INDEX IF NOT EXISTS play_players_play ON play_players (play_id);
+CREATE INDEX IF NOT EXISTS plays_game ON plays (game_id);
+CREATE INDEX IF NOT EXISTS plays_result ON plays (result);
+CREATE INDEX IF NOT EXISTS plays_touchdown ON plays (id) WHERE touchdown = 1;
+CREATE INDEX IF NOT EXISTS plays_situation ON plays (down, distance_bucket, zone);
+"""
+
+
+class ResultsStore:
+    """
+    SQLite store for games, team box scores and player lines. Writes are
+    buffered and flushed batch_size games at a time in one transaction.
+    player_seasons holds per-season player totals for leaderboards. They are
+    summed in Python as games come in and upserted on flush, so leaderboards
+    never have to scan player_games.
+
+    Records carrying play-by-play (iter_game_records(play_by_play=True)) also
+    fill plays and play_players, whose indexes back plays() queries.
+    """
+
+    def __init__(self, path, batch_size=2000):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.next_game_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM games").fetchone()[0]
+        self.next_play_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM plays").fetchone()[0]
+        self._games = []
+        self._plays = []
+        self._play_players = []
+        self._team_games = []
+        self._player_games = []
+        self._season_totals = {}
+
+    def add_game(self, record):
+        # record is a batch.game_record() dict, optionally with season and week;
+        # games outside a season are filed under season 0
+        game_id = self.next_game_id
+        self.next_game_id += 1
+        season = record.get("season") or 0
+        self._games.append((
+            game_id, season, record.get("week"), record["seed"],
+            record["home"], record["away"], record["home_score"], record["away_score"]
+        ))
+
+        box = record["box"]
+        for side, other, is_home in (("team1", "team2", 1), ("team2", "team1", 0)):
+            stats = box[side]["stats"]
+            self._team_games.append((
+                game_id, season, box[side]["name"], box[other]["name"], is_home,
+                box[side]["score"], box[other]["score"],
+                *[stats.get(name, 0) for name, _ in TEAM_STATS]
+            ))
+
+        season_totals = self._season_totals
+        for team, opponent, is_home, name, position, stats in record["players"]:
+            line = [stats.get(stat, 0) for stat in PLAYER_STATS]
+            self._player_games.append((game_id, season, team, opponent, int(is_home), name, position, *line))
+
+            key = (season, team, name)
+            totals = season_totals.get(key)
+            if totals is None:
+                season_totals[key] = [position, 1] + line
+            else:
+                totals[1] += 1
+                for i, value in enumerate(line, 2):
+                    totals[i] += value
+
+        for play in record.get("plays", ()):
+            play_id = self.next_play_id
+            self.next_play_id += 1
+            self._plays.append((
+                play_id, game_id, season, play["half"], play["clock"], play["offense"], play["defense"],
+                play["down"], play["distance"], play["yardline"],
+                distance_bucket(play["distance"]), field_zone(play["yardline"]),
+                play["play_type"], play["result"], play["yards"], int(play["touchdown"])
+            ))
+            for team, name, position, role in play["players"]:
+                self._play_players.append((play_id, team, name, position, role))
+
+        if len(self._games) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._games:
+            return
+        team_slots = ", ".join("?" * (7 + len(TEAM_STATS)))
+        player_slots = ", ".join("?" * (7 + len(PLAYER_STATS)))
+        season_slots = ", ".join("?" * (5 + len(PLAYER_STATS)))
+        season_updates = ", ".join(f"{stat} = {stat} + excluded.{stat}" for stat in ["games"] + PLAYER_STATS)
+        with self.conn:
+            self.conn.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._games)
+            self.conn.executemany(f"INSERT INTO team_games VALUES ({team_slots})", self._team_games)
+            self.conn.executemany(f"INSERT INTO player_games VALUES ({player_slots})", self._player_games)
+            self.conn.executemany(
+                f"INSERT INTO player_seasons VALUES ({season_slots}) "
+                f"ON CONFLICT (season, team, player) DO UPDATE SET {season_updates}",
+                [(season, team, name, *totals) for (season, team, name), totals in self._season_totals.items()]
+            )
+            self.conn.executemany("INSERT INTO plays VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._plays)
+            self.conn.executemany("INSERT INTO play_players VALUES (?, ?, ?, ?, ?)", self._play_players)
+        self._games = []
+        self._plays = []
+        self._play_players = []
+        self._team_games = []
+        self._player_games = []
+        self._season_totals = {}
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def leaders(self, season, stat, limit=10):
+        # e.g. leaders(1, "rush_yards") for the season's rushing leaders
+        if stat not in PLAYER_STATS:
+            raise ValueError(f"Unknown stat {stat!r}")
+        self.flush()
+        rows = self.conn.execute(
+            f"SELECT player, team, position, games, {stat} FROM player_seasons "
+            f"WHERE season = ? ORDER BY {stat} DESC LIMIT ?",
+            (season, limit)
+        ).fetchall()
+        return [
+            {"player": player, "team": team, "position": position, "games": games, stat: value}
+            for player, team, position, games, value in rows
+        ]
+
+    def head_to_head(self, team, opponent, season=None):
+        self.flush()
+        query = (
+            "SELECT COUNT(*), SUM(points > points_allowed), SUM(points < points_allowed), "
+            "SUM(points = points_allowed), SUM(points), SUM(points_allowed) "
+            "FROM team_games WHERE team = ? AND opponent = ?"
+        )
+        args = [team, opponent]
+        if season is not None:
+            query += " AND season = ?"
+            args.append(season)
+        games, wins, losses, ties, points, allowed = self.conn.execute(query, args).fetchone()
+        return {
+            "games": games, "wins": wins or 0, "losses": losses or 0, "ties": ties or 0,
+            "points_for": points or 0, "points_against": allowed or 0,
+        }
+
+    def player_splits(self, player, season=None, stats=("carries", "rush_yards", "receptions", "receiving_yards", "pass_yards", "tackles")):
+        # Per-game averages split by opponent and home/away
+        self.flush()
+        for stat in stats:
+            if stat not in PLAYER_STATS:
+                raise ValueError(f"Unknown stat {stat!r}")
+        averages = ", ".join(f"AVG({stat})" for stat in stats)
+        query = f"SELECT opponent, is_home, COUNT(*), {averages} FROM player_games WHERE player = ?"
+        args = [player]
+        if season is not None:
+            query += " AND season = ?"
+            args.append(season)
+        query += " GROUP BY opponent, is_home ORDER BY opponent, is_home DESC"
+        splits = []
+        for opponent, is_home, games, *values in self.conn.execute(query, args):
+            split = {"opponent": opponent, "home": bool(is_home), "games": games}
+            split.update(zip(stats, values))
+            splits.append(split)
+        return splits
+
+    def plays(self, player=None, role=None, team=None, result=None, down=None, distance=None, zone=None,
+              play_type=None, season=None, limit=None):
+        """
+        Stored plays matching every filter given, in the order they were
+        played, as PlayLog play dicts plus game_id and season. result is a
+        sim_play()/sim_drive() result string or "touchdown"; distance is a
+        distance_bucket() name and zone a field_zone() name. team is the
+        offense. For example, 3rd-and-long passes targeting a receiver:
+
+            store.plays(player="Rachel Hill", role="target", down=3, distance="long")
+
+        Player, result type and down lookups go through the play indexes
+        instead of scanning every stored play.
+        """
+        self.flush()
+        if role is not None and role not in ROLE_STATS and role not in KICK_ROLES.values():
+            raise ValueError(f"Unknown role {role!r}")
+        if distance is not None and distance not in ("short", "medium", "long"):
+            raise ValueError(f"Unknown distance bucket {distance!r}")
+        # The most selective filter given drives the lookup: player, then
+        # result, then situation. A unary + keeps SQLite from using the index
+        # on a less selective column instead (there are no ANALYZE stats)
+        conditions = []
+        args = []
+        by_player = player is not None or role is not None
+        if by_player:
+            involved = []
+            if player is not None:
+                involved.append("player = ?")
+                args.append(player)
+            if role is not None:
+                involved.append("role = ?")
+                args.append(role)
+            conditions.append(f"id IN (SELECT play_id FROM play_players WHERE {' AND '.join(involved)})")
+        if result == "touchdown":
+            conditions.append("+touchdown = 1" if by_player else "touchdown = 1")
+        elif result is not None:
+            conditions.append("+result = ?" if by_player else "result = ?")
+            args.append(result)
+        unindexed = "+" if by_player or result is not None else ""
+        for column, value in (("down", down), ("distance_bucket", distance), ("zone", zone)):
+            if value is not None:
+                conditions.append(f"{unindexed}{column} = ?")
+                args.append(value)
+        for column, value in (("offense", team), ("play_type", play_type), ("season", season)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                args.append(value)
+        query = (
+            "SELECT id, game_id, season, half, clock, offense, defense, down, distance, yardline, "
+            "play_type, result, yards, touchdown FROM plays"
+        )
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+
+        plays = {}
+        for (play_id, game_id, play_season, half, clock, offense, defense, play_down, play_distance,
+             yardline, kind, play_result, yards, touchdown) in self.conn.execute(query, args):
+            plays[play_id] = {
+                "game_id": game_id, "season": play_season, "half": half, "clock": clock,
+                "offense": offense, "defense": defense,
+                "down": play_down, "distance": play_distance, "yardline": yardline,
+                "play_type": kind, "result": play_result, "yards": yards, "touchdown": bool(touchdown),
+                "players": [],
+            }
+        ids = list(plays)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT play_id, team, player, position, role FROM play_players "
+                f"WHERE play_id IN ({', '.join('?' * len(chunk))}) ORDER BY rowid",
+                chunk
+            )
+            for play_id, *involved in rows:
+                plays[play_id]["players"].append(tuple(involved))
+        return list(plays.values())
+
+    def standings(self, season):
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT team, SUM(points > points_allowed), SUM(points < points_allowed), "
+            "SUM(points = points_allowed), SUM(points), SUM(points_allowed) "
+            "FROM team_games WHERE season = ? GROUP BY team "
+            "ORDER BY (SUM(points > points_allowed) + 0.5 * SUM(points = points_allowed)) / COUNT(*) DESC, "
+            "SUM(points) - SUM(points_allowed) DESC",
+            (season,)
+        ).fetchall()
+        return {
+            team: {"wins": w, "losses": l, "ties": t, "points_for": pf, "points_against": pa}
+            for team, w, l, t, pf, pa in rows
+        }
+
+
+def store_batch(store, roster_data, home, away, start_seed=0, games=1000, season=0, workers=1,
+                play_by_play=False):
+    # Simulates a seed range of one matchup and writes every game to store
+    home_data = find_team_data(roster_data, home)
+    away_data = find_team_data(roster_data, away)
+    matchups = [(home_data, away_data, seed) for seed in range(start_seed, start_seed + games)]
+    for record in iter_game_records(matchups, workers, play_by_play=play_by_play):
+        record["season"] = season
+        store.add_game(record)
+    store.flush()
@@ -1,4 +1,84 @@
+import heapq
 import json
+import math
+from bisect import bisect
+
+# Ratings that fatigue penalties overwrite during a game
+FATIGUE_ATTRS = (
+    "speed", "strength", "elusiveness", "vision", "hands", "route_running",
+    "run_blocking", "pass_blocking", "rushing", "tackling", "coverage"
+)
+
+# Fatigue values near which a penalised rating can change, memoised per
+# tuple of original ratings (the same players are rebuilt for every game)
+_FATIGUE_BREAKS = {}
+# Fatigue kept clear of a break before trusting the ratings are unchanged
+BREAK_MARGIN = 1e-6
+NO_STABLE_FATIGUE = (float("inf"), float("-inf"))
+
+def fatigue_breaks(penalty_attrs):
+    key = tuple([(original, floor) for _, original, floor in penalty_attrs])
+    breaks = _FATIGUE_BREAKS.get(key)
+    if breaks is None:
+        # round(original * (1 - 0.0015 * fatigue)) steps from v to v - 1 where
+        # the product crosses v - 0.5; below the floor nothing moves. Ratings
+        # from JSON may be floats, so step over the whole values from the
+        # floor up to round(original), the highest the penalty produces.
+        points = set()
+        for original, floor in key:
+            for value in range(math.floor(floor) + 1, round(original) + 1):
+                # Kept even just outside 0..100: fatigue is capped at exactly
+                # 100, and a break there can compute as 100.00000000000001
+                points.add((1 - (value - 0.5) / original) / 0.0015)
+        breaks = _FATIGUE_BREAKS[key] = sorted(points)
+    return breaks
+
+# Position classes for the per-play fatigue passes, as bits of
+# Player.fatigue_class
+SKILL_OFFENSE = 1    # worn down by every run and pass
+PASS_COVERAGE = 2    # worn down by passes
+RUN_FRONT = 4        # worn down by runs
+
+FATIGUE_CLASSES = {
+    SKILL_OFFENSE: {"WR", "RB", "TE"},
+    PASS_COVERAGE: {"CB", "S", "OLB", "MLB", "ROLB", "LOLB"},
+    RUN_FRONT: {"DL", "OLB", "MLB", "ROLB", "LOLB", "S"},
+}
+# Positions that tire faster every snap in apply_general_fatigue (LOLB isn't
+# one of them)
+GENERAL_FATIGUE_SKILL_POSITIONS = frozenset({'RB', 'TE', 'WR', 'CB', 'OLB', 'MLB', 'ROLB', 'S'})
+
+_FATIGUE_PROFILES = {}
+
+def fatigue_profile(position, endurance):
+    """
+    (fatigue_class, general, skill_base, effort_scale, pass_idle, run_idle,
+    coverage, run_front) for a player: everything the game_functions fatigue
+    passes used to work out from position and endurance on every play,
+    computed with the same expressions so the sums come out bit for bit.
+    Memoised, since rosters repeat a handful of (position, endurance) pairs.
+    """
+    key = (position, endurance)
+    profile = _FATIGUE_PROFILES.get(key)
+    if profile is None:
+        fatigue_class = 0
+        for bit, positions in FATIGUE_CLASSES.items():
+            if position in positions:
+                fatigue_class |= bit
+        base_fatigue = 1.8 if position in GENERAL_FATIGUE_SKILL_POSITIONS else 0.1
+        general = base_fatigue + (((100 - endurance) / 100) * base_fatigue)
+        skill_base = 1 + (100 - endurance) / 80
+        profile = _FATIGUE_PROFILES[key] = (
+            fatigue_class,
+            general,
+            skill_base,
+            1 + (100 - endurance) / 100,
+            round(skill_base),
+            round(skill_base * 0.75),
+            round(0.5 + (100 - endurance) / 120, 1),
+            round(0.6 + (100 - endurance) / 110, 1),
+        )
+    return profile
 
 class Player:
     def __init__(self, data):
@@ -10,7 +90,10 @@ class Player:
         self.endurance = data.get("endurance", 50)
         self.fatigue = data.get("fatigue", 0)
         self.in_game = data.get("in_game", False)
-        self.stats = data.get("stats", {})
+        # Substitution order within a position: lower depth comes in first,
+        # ties go to whoever is listed first in the roster file
+        self.depth = data.get("depth", 0)
+        self.stats = dict(data.get("stats", {}))
 
         # Skill-specific
         self.passing = data.get("passing")
@@ -42,6 +125,23 @@ class Player:
             "tackling": self.tackling,
             "coverage": self.coverage
         }
+        # (attr, original, floor) for every rating fatigue can wear down
+        self._penalty_attrs = tuple(
+            (attr, value, round(value * (2 / 3)))
+            for attr, value in self._original_attrs.items() if value is not None
+        )
+        self._fatigue_breaks = fatigue_breaks(self._penalty_attrs)
+        # Open fatigue interval, between two breaks, in which the current
+        # ratings are exactly what apply_fatigue_penalty() would produce
+        self._stable_fatigue = NO_STABLE_FATIGUE
+        # Team play index when this player's fatigue was last brought up to
+        # date on the bench (None while in the game)
+        self._bench_play = None
+        # Position class bits and per-play fatigue increments (see
+        # fatigue_profile)
+        (self.fatigue_class, self.general_fatigue, self.skill_fatigue, self.effort_fatigue,
+         self.pass_idle_fatigue, self.run_idle_fatigue, self.coverage_fatigue,
+         self.run_front_fatigue) = fatigue_profile(self.position, self.endurance)
 
     def is_offense(self):
         return self.position in {"QB", "RB", "WR", "TE", "OL", "K", "P"}
@@ -52,27 +152,282 @@ class Player:
     def fatigue_level(self):
         return self.fatigue / max(self.endurance, 1)
 
+    def settle_fatigue(self, play_index):
+        # Bench recovery is applied lazily: replay the per-play recovery for
+        # every play missed since the last catch-up. Fatigue floors at 0, so
+        # this is at most ~100 / recovery steps. Repeating the subtraction
+        # (rather than fatigue - missed * recovery) keeps the values bit-for-bit
+        # identical to recovering every play.
+        missed = play_index - self._bench_play
+        self._bench_play = play_index
+        recovery = self.endurance / 10
+        fatigue = self.fatigue
+        while missed and fatigue:
+            fatigue = max(0, fatigue - recovery)
+            missed -= 1
+        self.fatigue = fatigue
+
+    def apply_fatigue_penalty(self):
+        # Returns the ratings that actually moved, or None. They are rounded,
+        # so while fatigue stays between the same two breaks none of them can
+        # move and the per-rating work is skipped.
+        fatigue = self.fatigue
+        low, high = self._stable_fatigue
+        if low < fatigue < high:
+            return None
+        breaks = self._fatigue_breaks
+        i = bisect(breaks, fatigue)
+        low = breaks[i - 1] + BREAK_MARGIN if i else float("-inf")
+        high = breaks[i] - BREAK_MARGIN if i < len(breaks) else float("inf")
+        # Within the margin of a break the rounding can still go either way,
+        # so ratings worked out there don't vouch for the rest of the interval
+        self._stable_fatigue = (low, high) if low < fatigue < high else NO_STABLE_FATIGUE
+
+        fatigue_pct = fatigue / 100
+        penalty_scale = fatigue_pct * 0.15  # max 15% drop
+
+        changed = None
+        for attr, original_value, min_allowed in self._penalty_attrs:
+            new_value = max(min_allowed, round(original_value * (1 - penalty_scale)))
+            if new_value != getattr(self, attr):
+                setattr(self, attr, new_value)
+                if changed is None:
+                    changed = [attr]
+                else:
+                    changed.append(attr)
+        return changed
+
     def to_dict(self):
         return self.__dict__.copy()
 
+    def clone(self):
+        # Ratings are not read-only: apply_fatigue_penalty() setattr()s worn
+        # ratings every play. Sharing is safe only because the clone gets its
+        # own __dict__ and the ratings in it are immutable numbers, so a write
+        # rebinds the clone's attribute and never reaches the template.
+        # _original_attrs, _penalty_attrs and _fatigue_breaks are shared and
+        # must stay read-only; stats is mutated in place, so it is copied.
+        clone = Player.__new__(Player)
+        clone.__dict__.update(self.__dict__)
+        clone.stats = self.stats.copy()
+        return clone
+
+    def snapshot(self):
+        return (
+            self.fatigue,
+            self.in_game,
+            tuple(self.stats.items()),
+            tuple([getattr(self, attr) for attr in FATIGUE_ATTRS])
+        )
+
+    def restore(self, snapshot):
+        self.fatigue, self.in_game, stats, attrs = snapshot
+        self._bench_play = None
+        self._stable_fatigue = NO_STABLE_FATIGUE
+        self.stats = dict(stats)
+        for attr, value in zip(FATIGUE_ATTRS, attrs):
+            setattr(self, attr, value)
+
+
+class Lineup(list):
+    """
+    The players on the field for one side, in roster order, plus a cache of
+    lineup-level aggregates the play resolvers would otherwise rebuild every
+    snap (blocking sums, coverage, target weights, ...).
+
+    Each aggregate is stored with the positions it covers and the ratings it
+    reads at each of them, both given as functions of the position string so
+    they can use the very test the aggregate selects players by (an "OLB" or
+    "ILB" is covered by anything that takes 'LB' in position, whether or not
+    the stock roster has one). invalidate() drops only the aggregates reading
+    a rating that just moved; substitute() swaps the players in place and
+    drops the aggregates covering a position that changed.
+    """
+
+    __slots__ = ("_cache", "_reads", "_readers")
+
+    def __init__(self, players=()):
+        super().__init__(players)
+        self._cache = {}
+        # key -> reads of every aggregate computed so far. Which ratings an
+        # aggregate reads never changes, so each key is registered once and
+        # stays registered while its value comes and goes.
+        self._reads = {}
+        # position -> rating -> keys of the aggregates reading it, worked out
+        # from _reads the first time a player at that position changes
+        self._readers = {}
+
+    def aggregate(self, key, positions, reads, compute):
+        # compute(lineup) runs on a miss. positions(position): whether it
+        # looks at players there; reads(position): the ratings it depends on
+        # there (see positions_in() and rating_reads()).
+        entry = self._cache.get(key)
+        if entry is None:
+            entry = self._cache[key] = (positions, compute(self))
+            if key not in self._reads:
+                self._reads[key] = reads
+                for position, by_attr in self._readers.items():
+                    for attr in reads(position):
+                        by_attr.setdefault(attr, []).append(key)
+        return entry[1]
+
+    def invalidate(self, position, attrs):
+        by_attr = self._readers.get(position)
+        if by_attr is None:
+            by_attr = self._readers[position] = {}
+            for key, reads in self._reads.items():
+                for attr in reads(position):
+                    by_attr.setdefault(attr, []).append(key)
+        cache = self._cache
+        for attr in attrs:
+            for key in by_attr.get(attr, ()):
+                cache.pop(key, None)
+
+    def substitute(self, players, changed_positions):
+        self[:] = players
+        self._cache = {
+            key: entry for key, entry in self._cache.items()
+            if not any(map(entry[0], changed_positions))
+        }
+
+
+def positions_in(positions):
+    # Lineup.aggregate() positions for an aggregate that picks players by
+    # exact position
+    return frozenset(positions).__contains__
+
+def rating_reads(positions, attrs):
+    # Lineup.aggregate() reads: every rating in attrs at each position the
+    # positions test accepts
+    attrs = tuple(attrs)
+    return lambda position: attrs if positions(position) else ()
+
+NO_READS = rating_reads(positions_in(()), ())
+
+
+SKILL_POSITIONS = ("RB", "WR", "TE")
+
+class DepthChart:
+    """
+    Lineup for one side of the ball. Starters are kept per position and each
+    position's bench is a heap ordered by (depth, roster order), so a
+    substitution pops the best backup instead of re-sorting the roster.
+    Only positions in sub_positions rotate; None means every position.
+    """
+
+    def __init__(self, players, sub_positions=None):
+        self.players = players
+        self.starters = {}
+        self.bench = {}
+        for order, player in enumerate(players):
+            if sub_positions is not None and player.position not in sub_positions:
+                continue
+            if player.in_game:
+                self.starters.setdefault(player.position, []).append(player)
+            else:
+                self.bench.setdefault(player.position, []).append((player.depth, order, player))
+        for bench in self.bench.values():
+            heapq.heapify(bench)
+        self.order = {id(p): order for order, p in enumerate(players)}
+        self.on_field = Lineup([p for p in players if p.in_game])
+
+    def _pop_fresh(self, bench, fatigue_threshold, play_index):
+        skipped = []
+        fresh = None
+        while bench:
+            entry = heapq.heappop(bench)
+            entry[2].settle_fatigue(play_index)
+            if entry[2].fatigue <= fatigue_threshold:
+                fresh = entry[2]
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(bench, entry)
+        return fresh
+
+    def substitute(self, fatigue_threshold, play_index):
+        swapped = []
+        for position, starters in self.starters.items():
+            bench = self.bench.get(position)
+            if not bench:
+                continue
+            for i, tired in enumerate(starters):
+                if tired.fatigue <= fatigue_threshold:
+                    continue
+                fresh = self._pop_fresh(bench, fatigue_threshold, play_index)
+                if fresh is None:
+                    break  # no fresh players available
+                tired.in_game = False
+                tired._bench_play = play_index
+                fresh.in_game = True
+                fresh._bench_play = None
+                # Bench players skip the per-play penalty pass, so catch up now
+                fresh.apply_fatigue_penalty()
+                starters[i] = fresh
+                heapq.heappush(bench, (tired.depth, self.order[id(tired)], tired))
+                swapped.append(position)
+
+        if swapped:
+            self.on_field.substitute([p for p in self.players if p.in_game], swapped)
+        return bool(swapped)
+
 
 class Team:
-    def __init__(self, name, offense, defense):
+    def __init__(self, name, offense, defense, sub_threshold=50):
         self.name = name
+        # Fatigue above which a starter is subbed out
+        self.sub_threshold = sub_threshold
         self.offense = [Player(p) for p in offense]
         self.defense = [Player(p) for p in defense]
+        # Number of recover_bench_players() calls so far
+        self.play_index = 0
+        self.refresh_lineups()
+
+    def refresh_lineups(self):
+        # Rebuild depth charts from the in_game flags; call after setting them by hand
+        for player in self.offense + self.defense:
+            if player._bench_play is not None:
+                player.settle_fatigue(self.play_index)
+            player._bench_play = None if player.in_game else self.play_index
+        self.depth_charts = {
+            "offense": DepthChart(self.offense, SKILL_POSITIONS),
+            "defense": DepthChart(self.defense),
+        }
+
+    def clone(self):
+        clone = Team.__new__(Team)
+        clone.name = self.name
+        clone.sub_threshold = self.sub_threshold
+        clone.play_index = self.play_index
+        clone.offense = [p.clone() for p in self.offense]
+        clone.defense = [p.clone() for p in self.defense]
+        clone.refresh_lineups()
+        return clone
+
+    def snapshot(self):
+        self.settle_bench()
+        return (
+            tuple([p.snapshot() for p in self.offense]),
+            tuple([p.snapshot() for p in self.defense])
+        )
+
+    def restore(self, snapshot):
+        offense, defense = snapshot
+        for player, player_snapshot in zip(self.offense, offense):
+            player.restore(player_snapshot)
+        for player, player_snapshot in zip(self.defense, defense):
+            player.restore(player_snapshot)
+        self.refresh_lineups()
 
     def get_offense(self, side="offense"):
-        players = getattr(self, side)
-        return [p for p in players if p.in_game]
+        return self.depth_charts[side].on_field
     
     def get_all_offense(self, side="offense"):
         players = getattr(self, side)
         return [p for p in players]
     
     def get_defense(self, side="defense"):
-        players = getattr(self, side)
-        return [p for p in players if p.in_game]
+        return self.depth_charts[side].on_field
         
     def get_all_defense(self, side="defense"):
         players = getattr(self, side)
@@ -85,69 +440,22 @@ class Team:
         return None
     
     def recover_bench_players(self):
+        # Every benched player recovers endurance / 10 per play. Rather than
+        # touching them all here, count the play and let settle_fatigue()
+        # work it out when their fatigue is next needed.
+        self.play_index += 1
+
+    def settle_bench(self):
+        # Brings every bench player's fatigue up to date, for code that reads it directly
         for p in self.offense + self.defense:
-            if not p.in_game:
-                recovery = p.endurance / 10
-                p.fatigue = max(0, p.fatigue - recovery)
+            if p._bench_play is not None:
+                p.settle_fatigue(self.play_index)
 
     def sub_skill_position_players(self, fatigue_threshold=50):
-        from operator import itemgetter
-
-        skill_positions = ['RB', 'WR', 'TE']
-
-        for pos in skill_positions:
-            # Get current in-game players of this position
-            starters = [p for p in self.offense if p.position == pos and p.in_game and p.fatigue > fatigue_threshold]
-            if not starters:
-                continue  # no one too tired
-
-            # Get bench players of same position who are fresh enough
-            bench = [p for p in self.offense if p.position == pos and not p.in_game and p.fatigue <= fatigue_threshold]
-            if not bench:
-                continue  # no fresh players available
-
-            # Prioritize fresh subs by fatigue ASC, then by total stats DESC
-            def stat_sum(player):
-                return sum(player.stats.values())
-
-            bench.sort(key=lambda p: (-stat_sum(p), p.fatigue))
-
-            # Sub one-for-one
-            for tired_player in starters:
-                if not bench:
-                    break
-                sub = bench.pop(0)
-                tired_player.in_game = False
-                sub.in_game = True
+        return self.depth_charts["offense"].substitute(fatigue_threshold, self.play_index)
 
     def sub_defensive_players(self, fatigue_threshold=50):
-        positions = set(p.position for p in self.defense)
-
-        for pos in positions:
-            # Players currently in the game and too tired
-            tired_players = [p for p in self.defense if p.position == pos and p.in_game and p.fatigue > fatigue_threshold]
-            if not tired_players:
-                continue
-
-            # Bench players eligible to sub in
-            bench = [p for p in self.defense if p.position == pos and not p.in_game and p.fatigue <= fatigue_threshold]
-            if not bench:
-                continue
-
-            # Prioritize by freshest and most productive
-            def stat_sum(player):
-                return sum(player.stats.values())
-
-            bench.sort(key=lambda p: (p.fatigue, -stat_sum(p)))
-
-            # Swap one-for-one
-            for tired in tired_players:
-                if not bench:
-                    break
-                fresh = bench.pop(0)
-                tired.in_game = False
-                fresh.in_game = True
-
+        return self.depth_charts["defense"].substitute(fatigue_threshold, self.play_index)
 
     def get_kicker(self):
         for p in self.offense:
@@ -156,29 +464,40 @@ class Team:
         return None
     
     def apply_fatigue_penalties(self):
-        for player in self.offense + self.defense:
-            fatigue_pct = player.fatigue / 100
-            penalty_scale = fatigue_pct * 0.15  # max 15% drop
-
-            for attr, original_value in player._original_attrs.items():
-                if original_value is None:
+        # Only players in the lineup; bench players are brought up to date
+        # when they sub in. The interval check is apply_fatigue_penalty()'s
+        # own, hoisted here because most players pass it most plays.
+        for chart in self.depth_charts.values():
+            lineup = chart.on_field
+            for player in lineup:
+                low, high = player._stable_fatigue
+                if low < player.fatigue < high:
                     continue
+                changed = player.apply_fatigue_penalty()
+                if changed:
+                    lineup.invalidate(player.position, changed)
 
-                min_allowed = round(original_value * (2 / 3))
-                new_value = round(original_value * (1 - penalty_scale))
-                setattr(player, attr, max(min_allowed, new_value))
-
-def initialize_teams(json_path):
+def load_roster_data(json_path):
     with open(json_path, "r") as f:
-        data = json.load(f)
+        return json.load(f)
 
-    teams = []
+def find_team_data(data, team):
+    # Accepts either a team name or an index into the "teams" list
+    if isinstance(team, int):
+        return data["teams"][team]
     for team_data in data["teams"]:
-        team = Team(
-            name=team_data["team_name"],
-            offense=team_data["offense"],
-            defense=team_data["defense"]
-        )
-        teams.append(team)
+        if team_data["team_name"] == team:
+            return team_data
+    raise KeyError(f"No team named {team!r} in roster file")
 
-    return teams
+def build_team(team_data):
+    return Team(
+        name=team_data["team_name"],
+        offense=team_data["offense"],
+        defense=team_data["defense"],
+        sub_threshold=team_data.get("sub_threshold", 50)
+    )
+
+def initialize_teams(json_path):
+    data = load_roster_data(json_path)
+    return [build_team(team_data) for team_data in data["teams"]]
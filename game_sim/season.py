@@ -0,0 +1,90 @@
+from roster import find_team_data
+from batch import iter_game_records
+
+def round_robin_schedule(team_names, double=True):
+    """
+    Circle-method round robin: a list of weeks, each a list of (home, away).
+    double=True adds the return legs so every pair meets once at each venue.
+    """
+    teams = list(team_names)
+    if len(teams) % 2:
+        teams.append(None)  # bye
+    weeks = []
+    for week in range(len(teams) - 1):
+        games = []
+        for i in range(len(teams) // 2):
+            home, away = teams[i], teams[-1 - i]
+            if home is None or away is None:
+                continue
+            # Alternate venues so nobody is always home
+            games.append((home, away) if (week + i) % 2 == 0 else (away, home))
+        weeks.append(games)
+        teams.insert(1, teams.pop())
+    if double:
+        weeks += [[(away, home) for home, away in games] for games in weeks]
+    return weeks
+
+def standings(results):
+    # results: dicts with home, away, home_score, away_score
+    table = {}
+    for game in results:
+        for team, scored, allowed in (
+            (game["home"], game["home_score"], game["away_score"]),
+            (game["away"], game["away_score"], game["home_score"]),
+        ):
+            row = table.setdefault(team, {"wins": 0, "losses": 0, "ties": 0, "points_for": 0, "points_against": 0})
+            row["points_for"] += scored
+            row["points_against"] += allowed
+            if scored > allowed:
+                row["wins"] += 1
+            elif scored < allowed:
+                row["losses"] += 1
+            else:
+                row["ties"] += 1
+
+    def win_pct(row):
+        played = row["wins"] + row["losses"] + row["ties"]
+        return (row["wins"] + 0.5 * row["ties"]) / played if played else 0
+
+    return dict(sorted(
+        table.items(),
+        key=lambda item: (-win_pct(item[1]), item[1]["points_against"] - item[1]["points_for"])
+    ))
+
+def run_season(roster_data, teams=None, season=1, schedule=None, start_seed=0, workers=1, store=None,
+               play_by_play=False):
+    """
+    Plays a full schedule (round robin of teams by default). Game n of the
+    season is seeded start_seed + n. Every game is written to store when one
+    is given, with its play-by-play if play_by_play is set.
+    """
+    if teams is None:
+        teams = [team_data["team_name"] for team_data in roster_data["teams"]]
+    if schedule is None:
+        schedule = round_robin_schedule(teams)
+
+    games = []
+    weeks = []
+    for week, matchups in enumerate(schedule, 1):
+        for home, away in matchups:
+            seed = start_seed + len(games)
+            games.append((find_team_data(roster_data, home), find_team_data(roster_data, away), seed))
+            weeks.append(week)
+
+    results = []
+    for week, record in zip(weeks, iter_game_records(games, workers, play_by_play=play_by_play and store is not None)):
+        record["season"] = season
+        record["week"] = week
+        if store is not None:
+            store.add_game(record)
+        results.append({
+            "week": week,
+            "home": record["home"],
+            "away": record["away"],
+            "home_score": record["home_score"],
+            "away_score": record["away_score"],
+        })
+    if store is not None:
+        store.flush()
+
+    return {"season": season, "games": results, "standings": standings(results)}
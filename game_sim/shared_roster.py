@@ -0,0 +1,104 @@
+import pickle
+import struct
+from multiprocessing import shared_memory
+from engine_constants import constants
+from roster import build_team
+
+# Read-only team data and engine constants for process-pool workers,
+# published once by the parent in a multiprocessing.shared_memory segment.
+# Pool tasks then refer to teams by their index in the segment instead of
+# carrying roster dicts:
+#
+#   with SharedRoster([home_data, away_data]) as shared, \
+#           Pool(workers, initializer=attach_roster, initargs=(shared.name,)) as pool:
+#       pool.map(task, [(0, 1, seed, count), ...])
+#
+# and anything that takes a team's roster data (sim_seeded_game(),
+# new_team(), team_data()) takes such an index as well. A worker reads the
+# segment once, when it attaches, and builds each team it plays once; every
+# game then gets a clone of that template, which shares the ratings and
+# copies only fatigue, lineup and stats state (about half the cost of
+# build_team()). Workers also take the parent's engine constants from the
+# segment, so they play with whatever the parent had loaded.
+#
+# Segment layout: HEADER (magic, format, payload length) followed by the
+# pickled {"teams": [team data, ...], "constants": EngineConstants.to_dict()}.
+
+HEADER = struct.Struct("<4sII")
+MAGIC = b"FSRS"
+SEGMENT_FORMAT = 1
+
+
+class SharedRoster:
+    """
+    The parent's side: creates the segment for teams (roster team dicts, in
+    index order). index() finds a team dict's index by identity. Close it, or
+    use it as a context manager, to unlink the segment once the pool is done.
+    """
+
+    def __init__(self, teams, constant_values=None):
+        self.teams = list(teams)
+        self._indexes = {id(team): i for i, team in enumerate(self.teams)}
+        if constant_values is None:
+            constant_values = constants.to_dict()
+        payload = pickle.dumps({"teams": self.teams, "constants": constant_values}, pickle.HIGHEST_PROTOCOL)
+        self._segment = shared_memory.SharedMemory(create=True, size=HEADER.size + len(payload))
+        HEADER.pack_into(self._segment.buf, 0, MAGIC, SEGMENT_FORMAT, len(payload))
+        self._segment.buf[HEADER.size:HEADER.size + len(payload)] = payload
+        self.name = self._segment.name
+
+    def index(self, team_data):
+        return self._indexes[id(team_data)]
+
+    def close(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment.unlink()
+            self._segment = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# The worker's side: the attached segment's name, its team data, and one
+# built Team per index played so far
+_attached = None
+_teams = []
+_templates = {}
+
+def attach_roster(name):
+    # Pool initializer. Loads the segment's teams and constants into this
+    # process; attaching to the same segment again is a no-op.
+    global _attached, _teams
+    if name == _attached:
+        return
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        magic, segment_format, length = HEADER.unpack_from(segment.buf, 0)
+        if magic != MAGIC or segment_format != SEGMENT_FORMAT:
+            raise ValueError(f"shared memory segment {name!r} is not a format {SEGMENT_FORMAT} roster")
+        with segment.buf[HEADER.size:HEADER.size + length] as payload:
+            data = pickle.loads(payload)
+    finally:
+        segment.close()
+    constants.update(data["constants"])
+    _teams = data["teams"]
+    _templates.clear()
+    _attached = name
+
+def team_data(team):
+    # Roster data for a team dict or an index into the attached roster
+    return _teams[team] if isinstance(team, int) else team
+
+def new_team(team):
+    # A fresh Team, ready for a game, from a team dict or an index into the
+    # attached roster
+    if not isinstance(team, int):
+        return build_team(team)
+    template = _templates.get(team)
+    if template is None:
+        template = _templates[team] = build_team(_teams[team])
+    return template.clone()
@@ -1,3 +1,104 @@
-from start_game import simulate_full_game
+import argparse
+import sys
 
-simulate_full_game()
\ No newline at end of file
+# Only argparse is imported up front; the engine is imported inside the
+# commands so --help returns immediately and spawned workers don't pay for it.
+
+def parse_team(value):
+    return int(value) if value.isdigit() else value
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Simulate football games.")
+    parser.add_argument("--roster", help="roster JSON file (default: rosters.json next to this script)")
+    parser.add_argument("--home", type=parse_team, default=0, help="home team name or index (default: 0)")
+    parser.add_argument("--away", type=parse_team, default=1, help="away team name or index (default: 1)")
+    parser.add_argument("-n", "--games", type=positive_int, default=1, help="number of games to simulate (default: 1)")
+    parser.add_argument("-w", "--workers", type=positive_int, default=1, help="worker processes for batches (default: 1)")
+    parser.add_argument("--threads", action="store_true", help="run batch workers as threads in this process")
+    parser.add_argument("--seed", type=int, help="seed for the first game; game i uses seed + i")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="output format")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="-v adds player stat lines, -vv also logs scoring drives")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the final score, or the average score of a batch")
+    return parser
+
+def run_single_game(args, roster_data):
+    import json
+    from engine_random import rng
+    from roster import build_team, find_team_data
+    from game_functions import apply_baseline_fatigue
+    from start_game import play_game, pretty_print_stats
+
+    if args.seed is not None:
+        rng.seed(args.seed)
+    home_team = build_team(find_team_data(roster_data, args.home))
+    away_team = build_team(find_team_data(roster_data, args.away))
+    apply_baseline_fatigue(home_team)
+    apply_baseline_fatigue(away_team)
+
+    text = args.format == "text"
+    box = play_game(
+        home_team, away_team,
+        verbose=text and not args.quiet,
+        log_drives=text and args.verbose >= 2
+    )
+
+    if not text:
+        print(json.dumps(box, indent=2))
+    elif args.quiet:
+        print(f"{box['team1']['name']} {box['team1']['score']} - {box['team2']['name']} {box['team2']['score']}")
+    elif args.verbose:
+        pretty_print_stats(home_team)
+        pretty_print_stats(away_team)
+
+def run_many_games(args, roster_data):
+    import json
+    from batch import run_batch
+
+    start_seed = args.seed if args.seed is not None else 0
+    batch = run_batch(roster_data, args.home, args.away, start_seed, args.games, args.workers, threads=args.threads)
+    if args.format == "json":
+        print(json.dumps(batch, indent=2))
+        return
+
+    games = batch["games"]
+    team1, team2 = batch["team1"], batch["team2"]
+    average = f"Average score: {team1['points'] / games:.1f} - {team2['points'] / games:.1f}"
+    if args.quiet:
+        print(average)
+        return
+
+    print(f"{team1['name']} vs {team2['name']}: {games} games, seeds {start_seed}-{start_seed + games - 1}")
+    print(f"{team1['name']} wins: {team1['wins']} ({team1['wins'] / games:.1%})")
+    print(f"{team2['name']} wins: {team2['wins']} ({team2['wins'] / games:.1%})")
+    print(f"Ties: {batch['ties']} ({batch['ties'] / games:.1%})")
+    print(average)
+
+    print(f"\n{'PER GAME':<25}{team1['name']:<20}{team2['name']:<20}")
+    print("-" * 65)
+    for stat in team1["stats"]:
+        per_game1 = f"{team1['stats'][stat] / games:.1f}"
+        per_game2 = f"{team2['stats'][stat] / games:.1f}"
+        print(f"{stat:<25}{per_game1:<20}{per_game2:<20}")
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    from roster import load_roster_data
+    from start_game import ROSTER_PATH
+
+    roster_data = load_roster_data(args.roster or ROSTER_PATH)
+    if args.games == 1:
+        run_single_game(args, roster_data)
+    else:
+        run_many_games(args, roster_data)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
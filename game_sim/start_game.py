@@ -1,57 +1,75 @@
-from roster import Player, Team, initialize_teams
+from roster import load_roster_data, find_team_data, build_team
 from game_functions import sim_kickoff, sim_pat, apply_baseline_fatigue, produce_box_score
-from drive_functions import sim_drive
-import random
+from drive_functions import drive_plays, play_out
+from game_context import shared_context
+import os
 
-teams = initialize_teams("game_sim/rosters.json")
-home_team = teams[0]
-away_team = teams[1]
-apply_baseline_fatigue(home_team)
-apply_baseline_fatigue(away_team)
+ROSTER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rosters.json")
 
-def determine_receiving_team(receive_prob=0.8):
-    toss_winner = random.choice(["home", "away"])
-    return toss_winner if random.random() < receive_prob else ("away" if toss_winner == "home" else "home")
+def determine_receiving_team(receive_prob=0.8, ctx=shared_context):
+    toss_winner = ctx.rng.choice(["home", "away"])
+    return toss_winner if ctx.rng.random() < receive_prob else ("away" if toss_winner == "home" else "home")
 
-def start_half(receiving_team_str, score_dict, half=1, verbose=False):
+def start_half(home_team, away_team, receiving_team_str, score_dict, half=1, verbose=False, play_log=None, ctx=shared_context):
+    return play_out(start_half_plays(home_team, away_team, receiving_team_str, score_dict, half, verbose, play_log, ctx))
+
+def start_half_plays(home_team, away_team, receiving_team_str, score_dict, half=1, verbose=False, play_log=None, ctx=shared_context):
     seconds_remaining = 2400
     driving_team = home_team if receiving_team_str == "home" else away_team
     kicking_team = away_team if driving_team == home_team else home_team
 
-    kickoff_yardline = sim_kickoff(kicking_team.get_kicker())
-    seconds_remaining -= random.randint(4, 12)
+    kickoff_yardline = sim_kickoff(kicking_team.get_kicker(), ctx)
+    seconds_remaining -= ctx.rng.randint(4, 12)
     start_yardline = kickoff_yardline
 
     if verbose:
         print(f"\n=== START OF HALF {half} ===")
 
+    return (yield from half_plays(home_team, away_team, receiving_team_str, score_dict, start_yardline, seconds_remaining, half, verbose=verbose, play_log=play_log, ctx=ctx))
+
+def finish_half(home_team, away_team, driving_team_str, score_dict, start_yardline, seconds_remaining, half=1, down=1, first_down_yardage=10, verbose=False, play_log=None, ctx=shared_context):
+    # Plays out the rest of a half; the first drive can start mid-series
+    return play_out(half_plays(
+        home_team, away_team, driving_team_str, score_dict, start_yardline, seconds_remaining,
+        half, down, first_down_yardage, verbose, play_log, ctx
+    ))
+
+def half_plays(home_team, away_team, driving_team_str, score_dict, start_yardline, seconds_remaining, half=1, down=1, first_down_yardage=10, verbose=False, play_log=None, ctx=shared_context):
+    # finish_half() as a generator, yielding what drive_plays() does plus a 0
+    # once each drive's scoring and change of possession are settled
+    driving_team = home_team if driving_team_str == "home" else away_team
+    if play_log is not None:
+        play_log.half = half
+
     while seconds_remaining > 0:
         offense = driving_team
         defense = away_team if driving_team == home_team else home_team
         hurrying = seconds_remaining <= 120
 
-        play_ran, result, yardline, seconds_remaining = sim_drive(
-            offense, defense, 1, 10, start_yardline, seconds_remaining, hurrying, verbose=False
+        play_ran, result, yardline, seconds_remaining = yield from drive_plays(
+            offense, defense, down, first_down_yardage, start_yardline, seconds_remaining, hurrying, verbose=False,
+            play_log=play_log, ctx=ctx
         )
+        down, first_down_yardage = 1, 10
 
         if result == 'touchdown':
             if verbose:
                 print(f"{driving_team.name} TOUCHDOWN!", play_ran)
             score_dict[driving_team.name] += 6
-            if sim_pat(driving_team.get_kicker()):
+            if sim_pat(driving_team.get_kicker(), ctx=ctx):
                 if verbose:
                     print(f"{driving_team.name} PAT is GOOD.")
                 score_dict[driving_team.name] += 1
             else:
                 if verbose:
                     print(f"{driving_team.name} PAT is NO GOOD.")
-            start_yardline = sim_kickoff(driving_team.get_kicker())
+            start_yardline = sim_kickoff(driving_team.get_kicker(), ctx)
 
         elif result == 'field goal':
             if verbose:
                 print(f"{driving_team.name} FIELD GOAL is GOOD.")
             score_dict[driving_team.name] += 3
-            start_yardline = sim_kickoff(driving_team.get_kicker())
+            start_yardline = sim_kickoff(driving_team.get_kicker(), ctx)
 
         elif result == 'punt':
             if verbose:
@@ -68,6 +86,10 @@ def start_half(receiving_team_str, score_dict, half=1, verbose=False):
                 print(f"{driving_team.name} turned it over.")
             start_yardline = 100 - yardline
 
+        if play_log is not None:
+            play_log.record_drive(driving_team, result, score_dict, seconds_remaining)
+        yield 0
+
         # Switch possession
         driving_team = away_team if driving_team == home_team else home_team
 
@@ -97,11 +119,44 @@ def pretty_print_stats(team, side='both'):
                         print(f"  {stat.replace('_', ' ').title()}: {val}")
                 print("")
 
-def simulate_full_game():
+def play_game(home_team, away_team, verbose=False, log_drives=False, play_log=None, ctx=shared_context):
+    # play_log: optional play_log.PlayLog to record the game's play-by-play
+    # in. ctx: the game's GameContext; games run concurrently each need their own
+    return play_out(game_plays(home_team, away_team, verbose, log_drives, play_log, ctx))
+
+def game_plays(home_team, away_team, verbose=False, log_drives=False, play_log=None, ctx=shared_context):
+    # play_game() as a generator: yields the game seconds of every snap, kick
+    # and punt as it is played and returns the box score
     score = {home_team.name: 0, away_team.name: 0}
-    receiving_team_first_half = determine_receiving_team()
-    score = start_half(receiving_team_first_half, score, half=1)
+    if play_log is not None:
+        play_log.start_game(home_team, away_team)
+    receiving_team_first_half = determine_receiving_team(ctx=ctx)
+    score = yield from start_half_plays(home_team, away_team, receiving_team_first_half, score, half=1, verbose=log_drives, play_log=play_log, ctx=ctx)
     receiving_team_second_half = "away" if receiving_team_first_half == "home" else "home"
-    score = start_half(receiving_team_second_half, score, half=2)
-    produce_box_score(home_team, away_team, score[home_team.name], score[away_team.name], True)
+    score = yield from start_half_plays(home_team, away_team, receiving_team_second_half, score, half=2, verbose=log_drives, play_log=play_log, ctx=ctx)
+    return produce_box_score(home_team, away_team, score[home_team.name], score[away_team.name], verbose)
+
+def finish_game(state, verbose=False, ctx=shared_context):
+    # Continues a GameState to the final whistle and returns the final score dict
+    score = state.score_dict()
+    score = finish_half(
+        state.home, state.away, state.possession, score, state.yardline, state.seconds_remaining,
+        state.half, state.down, state.distance, verbose=verbose, ctx=ctx
+    )
+    if state.half == 1:
+        score = start_half(state.home, state.away, state.second_half_receiver, score, half=2, verbose=verbose, ctx=ctx)
+    return score
+
+def load_teams(roster_path=ROSTER_PATH, home=0, away=1):
+    # Fresh teams with baseline fatigue applied, ready for kickoff
+    data = load_roster_data(roster_path)
+    home_team = build_team(find_team_data(data, home))
+    away_team = build_team(find_team_data(data, away))
+    apply_baseline_fatigue(home_team)
+    apply_baseline_fatigue(away_team)
+    return home_team, away_team
+
+def simulate_full_game(roster_path=ROSTER_PATH):
+    home_team, away_team = load_teams(roster_path)
+    return play_game(home_team, away_team, True)
 
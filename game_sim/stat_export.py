@@ -0,0 +1,212 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from multiprocessing import Pool
+from roster import find_team_data
+from shared_roster import SharedRoster, attach_roster
+
+# Binary layout of a stat lines file (<name>.bin):
+#
+#   offset 0   8 bytes   magic b"FSSTATS1"
+#   offset 8   uint32    format version (1)
+#   offset 12  uint32    number of players (P)
+#   offset 16  uint32    number of stats (S)
+#   offset 20  uint32    reserved (0)
+#   offset 24  uint64    number of games (G)
+#   offset 32  ...       zero padding up to HEADER_SIZE
+#   offset 64  float32   G * P * S values, little-endian, C order
+#
+# so the value for (game g, player p, stat s) lives at
+#   HEADER_SIZE + 4 * ((g * P + p) * S + s)
+#
+# A JSON sidecar (<name>.json) lists the players (team, name, position) and
+# stat names in index order, plus the seed range the games came from.
+MAGIC = b"FSSTATS1"
+VERSION = 1
+HEADER_SIZE = 64
+HEADER_FORMAT = "<8sIIIIQ"
+
+
+def roster_layout(home_data, away_data):
+    # Player and stat order shared by the writer and the sidecar
+    players = []
+    stats = set()
+    for team_data in (home_data, away_data):
+        for player in team_data["offense"] + team_data["defense"]:
+            players.append({"team": team_data["team_name"], "name": player["name"], "position": player["position"]})
+            stats.update(player.get("stats", {}))
+    return players, sorted(stats)
+
+def stat_line_values(teams, stats):
+    # One game's P * S values, in roster_layout order
+    values = array("f")
+    for team in teams:
+        for player in team.offense + team.defense:
+            player_stats = player.stats
+            values.extend([player_stats.get(stat, 0) for stat in stats])
+    return values
+
+
+class StatLineWriter:
+    """
+    Streams per-game stat lines into a .bin file. Games are buffered and
+    written in blocks of buffer_games, and the game count in the header is
+    filled in on close().
+    """
+
+    def __init__(self, path, players, stats, buffer_games=4096, metadata=None):
+        self.path = path
+        self.players = players
+        self.stats = stats
+        self.buffer_games = buffer_games
+        self.games = 0
+        self.buffer = array("f")
+        self.buffered = 0
+        self.metadata = metadata or {}
+        self.file = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(self.players), len(self.stats), 0, self.games)
+        self.file.seek(0)
+        self.file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+    def add_values(self, values, games=1):
+        # values holds games * P * S floats, e.g. from stat_line_values()
+        self.buffer.extend(values)
+        self.buffered += games
+        self.games += games
+        if self.buffered >= self.buffer_games:
+            self.flush()
+
+    def add_game(self, *teams):
+        self.add_values(stat_line_values(teams, self.stats))
+
+    def flush(self):
+        if sys.byteorder != "little":
+            self.buffer.byteswap()
+        self.file.write(self.buffer.tobytes())
+        self.buffer = array("f")
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        self._write_header()
+        self.file.close()
+        sidecar = dict(self.metadata)
+        sidecar.update({
+            "format": "FSSTATS1",
+            "version": VERSION,
+            "header_size": HEADER_SIZE,
+            "dtype": "float32 little-endian",
+            "shape": [self.games, len(self.players), len(self.stats)],
+            "players": self.players,
+            "stats": self.stats,
+        })
+        with open(sidecar_path(self.path), "w") as f:
+            json.dump(sidecar, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def sidecar_path(path):
+    return path[:-len(".bin")] + ".json" if path.endswith(".bin") else path + ".json"
+
+
+class StatLineArchive:
+    """
+    Read-only, memory-mapped view of a .bin file. Slices are memoryviews into
+    the mapping, so pulling one player's stat across every game only touches
+    the pages that hold it.
+    """
+
+    def __init__(self, path):
+        with open(sidecar_path(path)) as f:
+            self.metadata = json.load(f)
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, players, stats, _, games = struct.unpack_from(HEADER_FORMAT, self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} stat lines file")
+        self.games, self.num_players, self.num_stats = games, players, stats
+        self.values = memoryview(self.map)[HEADER_SIZE:HEADER_SIZE + 4 * games * players * stats].cast("f")
+        self.player_keys = {(p["team"], p["name"]): i for i, p in enumerate(self.metadata["players"])}
+        self.stat_keys = {stat: i for i, stat in enumerate(self.metadata["stats"])}
+
+    def player_index(self, team, name):
+        return self.player_keys[(team, name)]
+
+    def stat_index(self, stat):
+        return self.stat_keys[stat]
+
+    def value(self, game, player, stat):
+        return self.values[(game * self.num_players + player) * self.num_stats + stat]
+
+    def player_stat(self, team, name, stat):
+        # One player's stat in every game, as a strided memoryview
+        offset = self.player_index(team, name) * self.num_stats + self.stat_index(stat)
+        return self.values[offset::self.num_players * self.num_stats]
+
+    def game(self, game):
+        # Every player's line for one game, P * S values
+        row = self.num_players * self.num_stats
+        return self.values[game * row:(game + 1) * row]
+
+    def close(self):
+        self.values.release()
+        self.file.close()
+        try:
+            self.map.close()
+        except BufferError:
+            # Caller still holds slices; the mapping goes away with the last one
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _export_seed_range(args):
+    from batch import sim_seeded_game
+
+    home_data, away_data, start_seed, games, stats = args
+    values = array("f")
+    for seed in range(start_seed, start_seed + games):
+        home_team, away_team, _ = sim_seeded_game(home_data, away_data, seed)
+        values.extend(stat_line_values((home_team, away_team), stats))
+    return games, values
+
+def export_stat_lines(roster_data, home, away, path, start_seed=0, games=1000, workers=1, chunk_games=256):
+    """
+    Simulates games seeded start_seed .. start_seed + games - 1 and writes
+    every player's stat line to path. Workers simulate chunks of seeds and
+    the parent writes them in seed order.
+    """
+    from batch import split_seed_range
+
+    home_data = find_team_data(roster_data, home)
+    away_data = find_team_data(roster_data, away)
+    players, stats = roster_layout(home_data, away_data)
+    metadata = {"start_seed": start_seed, "games": games}
+
+    chunks = split_seed_range(start_seed, games, max(1, -(-games // chunk_games)))
+    with StatLineWriter(path, players, stats, metadata=metadata) as writer:
+        if workers <= 1:
+            for seed, count in chunks:
+                count, values = _export_seed_range((home_data, away_data, seed, count, stats))
+                writer.add_values(values, count)
+        else:
+            tasks = [(0, 1, seed, count, stats) for seed, count in chunks]
+            with SharedRoster([home_data, away_data]) as shared, \
+                    Pool(workers, initializer=attach_roster, initargs=(shared.name,)) as pool:
+                for count, values in pool.imap(_export_seed_range, tasks):
+                    writer.add_values(values, count)
+    return path
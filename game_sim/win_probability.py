@@ -0,0 +1,135 @@
+import time
+from collections import Counter
+from multiprocessing import Pool
+from roster import build_team, find_team_data
+from game_context import GameContext
+from game_state import GameState
+from start_game import finish_game
+
+# Live win probability: take the game as it stands right now, play it out
+# many times from that exact spot and count who wins.
+
+def situation_state(roster_data, home, away, half, seconds_remaining, home_score, away_score,
+                    possession, down, distance, yardline, fatigue=None, second_half_receiver=None):
+    """
+    Builds a GameState from a live situation. fatigue maps player name to
+    current fatigue; players not listed start fresh. second_half_receiver
+    defaults to the team not in possession, which is right whenever the
+    first-half receiver still has the ball.
+    """
+    home_team = build_team(find_team_data(roster_data, home))
+    away_team = build_team(find_team_data(roster_data, away))
+    for team in (home_team, away_team):
+        for player in team.offense + team.defense:
+            if fatigue and player.name in fatigue:
+                player.fatigue = fatigue[player.name]
+        team.apply_fatigue_penalties()
+
+    if second_half_receiver is None:
+        second_half_receiver = "away" if possession == "home" else "home"
+    return GameState(
+        home_team, away_team, half, seconds_remaining, home_score, away_score,
+        possession, down, distance, yardline, second_half_receiver
+    )
+
+def run_continuations(scratch, snapshot, seeds, deadline=None):
+    # Rewinds one scratch state to the branch point for every continuation
+    home_name = scratch.home.name
+    away_name = scratch.away.name
+    ctx = GameContext()
+    finals = []
+    for seed in seeds:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        scratch.restore(snapshot)
+        ctx.rng.seed(seed)
+        score = finish_game(scratch, ctx=ctx)
+        finals.append((score[home_name], score[away_name]))
+    return finals
+
+def summarize_continuations(finals):
+    count = len(finals)
+    if not count:
+        return {"continuations": 0}
+
+    home_wins = sum(1 for h, a in finals if h > a)
+    away_wins = sum(1 for h, a in finals if a > h)
+    home_points = Counter(h for h, _ in finals)
+    away_points = Counter(a for _, a in finals)
+    margins = Counter(h - a for h, a in finals)
+
+    return {
+        "continuations": count,
+        "home_win": home_wins / count,
+        "away_win": away_wins / count,
+        "tie": (count - home_wins - away_wins) / count,
+        "expected_home_score": sum(h for h, _ in finals) / count,
+        "expected_away_score": sum(a for _, a in finals) / count,
+        "home_score_distribution": {pts: n / count for pts, n in sorted(home_points.items())},
+        "away_score_distribution": {pts: n / count for pts, n in sorted(away_points.items())},
+        "margin_distribution": {m: n / count for m, n in sorted(margins.items())},
+    }
+
+
+# Worker processes build their scratch state once, then only receive
+# snapshots and seed ranges per request
+_worker_state = None
+
+def _init_worker(home_data, away_data):
+    global _worker_state
+    _worker_state = GameState(build_team(home_data), build_team(away_data))
+
+def _worker_continuations(args):
+    snapshot, start_seed, count, deadline = args
+    return run_continuations(_worker_state, snapshot, range(start_seed, start_seed + count), deadline)
+
+
+class WinProbabilityEngine:
+    """
+    Keeps worker processes warm between requests so a dashboard only pays for
+    the continuations themselves. Use workers=1 to run in-process.
+    """
+
+    def __init__(self, roster_data, home, away, workers=1):
+        self.home_data = find_team_data(roster_data, home)
+        self.away_data = find_team_data(roster_data, away)
+        self.workers = workers
+        self.pool = None
+        self.scratch = None
+        if workers > 1:
+            self.pool = Pool(workers, initializer=_init_worker, initargs=(self.home_data, self.away_data))
+        else:
+            self.scratch = GameState(build_team(self.home_data), build_team(self.away_data))
+
+    def evaluate(self, state, continuations=2000, seed=0, time_budget=None):
+        """
+        Plays out continuations copies of state. With time_budget (seconds),
+        stops early once the budget is spent and reports how many finished.
+        """
+        snapshot = state.snapshot()
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+
+        if self.pool is None:
+            finals = run_continuations(self.scratch, snapshot, range(seed, seed + continuations), deadline)
+            return summarize_continuations(finals)
+
+        chunk = -(-continuations // self.workers)
+        tasks = []
+        for start in range(seed, seed + continuations, chunk):
+            tasks.append((snapshot, start, min(chunk, seed + continuations - start), deadline))
+        finals = []
+        for part in self.pool.map(_worker_continuations, tasks):
+            finals.extend(part)
+        return summarize_continuations(finals)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()